@@ -0,0 +1,88 @@
+"""Compare trend-query cost of the macro log backends on synthetic history.
+
+Usage::
+
+    python benchmarks/bench_archive.py --years 12
+
+Prints median latency and peak traced memory for a three-metric query over
+the last 90 days and over the whole history, for each backend.
+"""
+
+import argparse
+import datetime
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from macro_manager.archive import ArchiveLogStore  # noqa: E402
+from macro_manager.logstore import NUMERIC_COLUMNS, CsvLogStore, SqliteLogStore  # noqa: E402
+
+METRICS = ["calories", "net_calories", "protein_g"]
+
+
+def synthetic_rows(years: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    end = datetime.date(2024, 12, 31)
+    start = end.replace(year=end.year - years + 1, month=1, day=1)
+    days = (end - start).days + 1
+    values = rng.normal(1000, 300, size=(days, len(NUMERIC_COLUMNS)))
+    return [
+        {
+            "datetime": f"{start + datetime.timedelta(days=i)}T20:00:00",
+            **dict(zip(NUMERIC_COLUMNS, values[i].tolist())),
+            "foods": "eggx2.0; Rice Cakex1.5; Yogurtx1.0",
+        }
+        for i in range(days)
+    ]
+
+
+def measure(fn, repeat: int) -> tuple[float, float]:
+    """Return (median seconds, peak traced MiB) for ``fn``."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak / 2**20
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows = synthetic_rows(args.years)
+    last = datetime.date.fromisoformat(rows[-1]["datetime"][:10])
+    recent = last - datetime.timedelta(days=89)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_store = CsvLogStore(tmp / "macro_log.csv")
+        pd.DataFrame(rows).to_csv(csv_store.path, index=False)
+        sqlite_store = SqliteLogStore(tmp / "macro_log.sqlite")
+        sqlite_store.upsert_many(rows)
+        archive = ArchiveLogStore(tmp / "macro_log.archive")
+        archive.upsert_many(rows)
+
+        print(f"{len(rows)} daily rows over {args.years} years")
+        print(f"{'backend':<8} {'query':<8} {'median ms':>10} {'peak MiB':>9}")
+        for name, store in [("csv", csv_store), ("sqlite", sqlite_store), ("archive", archive)]:
+            for label, start in [("90 days", recent), ("all", None)]:
+                secs, mib = measure(lambda: store.range(start, last, columns=METRICS), args.repeat)
+                print(f"{name:<8} {label:<8} {secs * 1e3:>10.2f} {mib:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
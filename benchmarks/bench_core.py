@@ -0,0 +1,232 @@
+"""Time the core hot paths on synthetic food libraries, meals and logs.
+
+Usage::
+
+    python benchmarks/bench_core.py --out results.json
+    python benchmarks/bench_core.py --sizes small --compare results.json
+
+Results are written as JSON (environment metadata plus one record per
+benchmark id) so two runs, e.g. before and after a change, can be compared
+with ``--compare``; ids slower than ``--threshold`` x the baseline median are
+flagged and make the exit status non-zero.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from macro_manager import db  # noqa: E402
+from macro_manager.logstore import (  # noqa: E402
+    NUMERIC_COLUMNS,
+    CsvLogStore,
+    SqliteLogStore,
+    format_logged_foods,
+    parse_logged_foods,
+)
+from macro_manager.models import NUTRIENTS, Food, Meal  # noqa: E402
+from macro_manager.optimize import SUGGEST_MAX_SERVINGS, suggest_servings  # noqa: E402
+from macro_manager.plot import build_dashboard_figure, save_dashboard  # noqa: E402
+
+SIZES = {
+    "small": {"foods": [1_000], "meal_items": [10, 100], "years": [1]},
+    "full": {"foods": [1_000, 10_000, 100_000], "meal_items": [10, 100, 1_000], "years": [1, 5, 20]},
+}
+# Realistic per-serving ranges for NUTRIENTS (g, g, g, g, g, mg, mg)
+_NUTRIENT_MAX = np.array([40, 30, 80, 15, 30, 1200, 900], dtype=float)
+
+
+def synthetic_foods(n: int, seed: int = 0) -> dict[str, Food]:
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.random((n, len(NUTRIENTS))) * _NUTRIENT_MAX, 1)
+    return {f"food-{i:06d}": Food(f"food-{i:06d}", *values[i].tolist()) for i in range(n)}
+
+
+def synthetic_meal(foods: dict[str, Food], items: int, seed: int = 0) -> Meal:
+    rng = np.random.default_rng(seed)
+    names = list(foods)
+    meal = Meal()
+    for i in rng.choice(len(names), size=items, replace=False):
+        meal.add(foods[names[i]], float(rng.choice([0.5, 1.0, 1.5, 2.0])))
+    return meal
+
+
+def synthetic_log(foods: dict[str, Food], years: int, seed: int = 0) -> list[dict]:
+    """One row per day ending 2024-12-31, each logging 3-12 foods."""
+    rng = np.random.default_rng(seed)
+    names = list(foods)
+    end = datetime.date(2024, 12, 31)
+    start = end.replace(year=end.year - years + 1, month=1, day=1)
+    days = (end - start).days + 1
+    values = rng.normal(1000, 300, size=(days, len(NUMERIC_COLUMNS)))
+    rows = []
+    for i in range(days):
+        picks = rng.choice(len(names), size=int(rng.integers(3, 13)), replace=False)
+        items = [(foods[names[j]], float(rng.choice([0.5, 1.0, 2.0]))) for j in picks]
+        rows.append({
+            "datetime": f"{start + datetime.timedelta(days=i)}T20:00:00",
+            **dict(zip(NUMERIC_COLUMNS, values[i].tolist())),
+            "foods": format_logged_foods(items),
+        })
+    return rows
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict:
+    """Median/min seconds of ``fn`` over ``repeat`` runs (``setup`` untimed before each)."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(times), "min_s": min(times), "repeat": repeat}
+
+
+def run(sizes: dict, repeat: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+
+    def record(bench_id: str, stats: dict) -> None:
+        results[bench_id] = stats
+        print(f"{bench_id:<44} {stats['median_s'] * 1e3:>10.3f} ms", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for n in sizes["foods"]:
+            foods = synthetic_foods(n)
+            path = tmp / f"foods_{n}.yaml"
+            # save_foods also recompiles the binary snapshot
+            record(f"save_foods[foods={n}]", measure(lambda: db.save_foods(foods, path), repeat))
+
+            def cold() -> None:
+                db.invalidate_foods_cache(path)
+                db.snapshot_path(path).unlink(missing_ok=True)
+
+            record(f"load_foods.yaml[foods={n}]", measure(lambda: db.load_foods(path), repeat, cold))
+            record(
+                f"load_foods.snapshot[foods={n}]",
+                measure(lambda: db.load_foods(path), repeat, lambda: db.invalidate_foods_cache(path)),
+            )
+            record(f"load_foods.cached[foods={n}]", measure(lambda: db.load_foods(path), repeat))
+            table = db.load_foods(path)
+            record(
+                f"suggest_servings[foods={n}]",
+                measure(lambda: suggest_servings(table, max_servings=SUGGEST_MAX_SERVINGS), repeat),
+            )
+
+        library = synthetic_foods(max(max(sizes["meal_items"]), 1_000))
+        table = db.FoodTable(library.values())
+        for k in sizes["meal_items"]:
+            meal = synthetic_meal(library, k)
+            picked = [food for food, _ in meal.items]
+            quantities = meal.quantities
+
+            def build_totals() -> None:
+                m = Meal(table=table)
+                for food in picked:
+                    m.add(table[food.name], quantities[food.name])
+                m.totals
+
+            def update_totals() -> None:
+                meal.set_servings(picked[0], meal.quantities[picked[0].name] + 0.25)
+                meal.totals
+
+            record(f"Meal.totals.build[items={k}]", measure(build_totals, repeat))
+            record(f"Meal.totals.update[items={k}]", measure(update_totals, repeat))
+            record(f"build_dashboard_figure[items={k}]", measure(lambda: build_dashboard_figure(meal, 2400), repeat))
+
+        meal = synthetic_meal(library, 10)
+        for years in sizes["years"]:
+            rows = synthetic_log(library, years)
+            strings = [row["foods"] for row in rows]
+            record(
+                f"parse_logged_foods[years={years}]",
+                measure(lambda: [parse_logged_foods(s) for s in strings], repeat),
+            )
+            csv_store = CsvLogStore(tmp / f"log_{years}.csv")
+            pd.DataFrame(rows).to_csv(csv_store.path, index=False)
+            middle = rows[len(rows) // 2]["datetime"][:10]
+            record(f"CsvLogStore.dates[years={years}]", measure(csv_store.dates, repeat))
+            record(f"CsvLogStore.get[years={years}]", measure(lambda: csv_store.get(middle), repeat))
+            sqlite_store = SqliteLogStore(tmp / f"log_{years}.sqlite")
+            sqlite_store.upsert_many(rows)
+            for backend, store in [("csv", csv_store), ("sqlite", sqlite_store)]:
+                out = tmp / f"out_{backend}_{years}"
+                record(
+                    f"save_dashboard.{backend}[years={years}]",
+                    measure(lambda: save_dashboard(meal, 2400, 2000, 400, directory=out, store=store), repeat),
+                )
+    return results
+
+
+def environment() -> dict:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "git_rev": rev,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Print current vs baseline medians; return the ids slower than ``threshold``x."""
+    regressions = []
+    print(f"\n{'benchmark':<44} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for bench_id, stats in results.items():
+        base = baseline.get(bench_id)
+        if base is None:
+            continue
+        ratio = stats["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{bench_id:<44} {base['median_s'] * 1e3:>10.3f} {stats['median_s'] * 1e3:>10.3f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(bench_id)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", choices=list(SIZES), default="full")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="regression ratio (default 1.25)")
+    args = parser.parse_args(argv)
+
+    results = run(SIZES[args.sizes], args.repeat)
+    if args.out:
+        payload = {"environment": environment(), "sizes": args.sizes, "results": results}
+        args.out.write_text(json.dumps(payload, indent=2) + "\n")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Drive N concurrent simulated sessions through the app with Streamlit's AppTest.
+
+Usage::
+
+    python benchmarks/load_sessions.py --sessions 1 2 4 8 --iterations 5
+
+Each session repeatedly selects foods, changes servings, edits workouts and
+saves the day. All sessions run in this process, as they would inside one
+Streamlit server, so they share the food, render and log caches. For every
+concurrency level the script reports p50/p95/p99 rerun latency, reruns/s,
+peak RSS (the process high-water mark so far, so list levels in increasing
+order; not available on Windows) and per-phase latency. The save phase is
+timed until the queued log write has finished, not just until it is queued.
+
+The app runs from a temporary copy of the repository, so the real food
+library, profile and log are never touched.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+PHASES = ["load", "select", "servings", "workouts", "save"]
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+def peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def share_test_runtime() -> None:
+    """Let concurrent AppTest runs share a mock Runtime.
+
+    AppTest installs a mock ``Runtime`` singleton at the start of every run
+    and clears it at the end, which breaks any other session still running.
+    Falling back to the most recent mock keeps overlapping runs working.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    original = Runtime.instance.__func__
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last:
+            return last["runtime"]
+        return original(cls)
+
+    Runtime.instance = classmethod(instance)
+
+
+def session(app_path: Path, food_names: list[str], iterations: int, seed: int) -> list[tuple[str, float]]:
+    """Run one scripted session; return ``(phase, seconds)`` for every rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    from macro_manager.export import EXPORT_WORKER
+
+    rng = random.Random(seed)
+    timings = []
+
+    def rerun(phase: str, at) -> None:
+        t0 = time.perf_counter()
+        at.run()
+        if phase == "save":
+            # The click only queues the write; wait for it to land
+            EXPORT_WORKER.flush()
+        timings.append((phase, time.perf_counter() - t0))
+        if at.exception:
+            raise RuntimeError(f"{phase}: {at.exception[0].value}")
+
+    at = AppTest.from_file(str(app_path), default_timeout=120)
+    rerun("load", at)
+    for _ in range(iterations):
+        picks = rng.sample(food_names, k=min(len(food_names), rng.randint(2, 6)))
+        at.multiselect(key="selected_foods").set_value(picks)
+        rerun("select", at)
+        for name in picks[:2]:
+            at.number_input(key=f"serving_{name}").set_value(rng.choice([0.5, 1.5, 2.0]))
+            rerun("servings", at)
+        at.session_state["workouts"] = [
+            {"Workout": "Run", "Calories": float(rng.randint(100, 600)), "Error (kcal)": 25.0}
+        ]
+        rerun("workouts", at)
+        next(b for b in at.button if b.label.startswith("💾")).click()
+        rerun("save", at)
+    return timings
+
+
+def run_level(app_path: Path, food_names: list[str], sessions: int, iterations: int) -> dict:
+    start = threading.Barrier(sessions)
+
+    def one(i: int) -> list[tuple[str, float]]:
+        start.wait()
+        return session(app_path, food_names, iterations, seed=i)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        per_session = list(pool.map(one, range(sessions)))
+    wall = time.perf_counter() - t0
+
+    by_phase: dict[str, list[float]] = defaultdict(list)
+    for timings in per_session:
+        for phase, secs in timings:
+            by_phase[phase].append(secs)
+    latencies = [secs for values in by_phase.values() for secs in values]
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p95_ms": percentile(latencies, 95) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "peak_rss_mib": peak_rss_mib(),
+        "phases": {
+            phase: {
+                "p50_ms": percentile(by_phase[phase], 50) * 1e3,
+                "p95_ms": percentile(by_phase[phase], 95) * 1e3,
+                "mean_ms": statistics.fmean(by_phase[phase]) * 1e3,
+            }
+            for phase in PHASES
+            if by_phase[phase]
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--iterations", type=int, default=5, help="select/serve/workout/save cycles per session")
+    parser.add_argument("--backend", choices=["sqlite", "archive", "csv"], default=None,
+                        help="log backend (default: the app's)")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        shutil.copytree(ROOT / "macro_manager", root / "macro_manager",
+                        ignore=shutil.ignore_patterns("__pycache__", "macro_log*", "*.png"))
+        shutil.copytree(ROOT / "data", root / "data")
+        # Import the copy, so the app's data and log paths point into ``root``
+        sys.path.insert(0, str(root))
+        if args.backend:
+            os.environ["MACRO_MANAGER_LOG_BACKEND"] = args.backend
+        from macro_manager.db import load_foods
+        from macro_manager.export import EXPORT_WORKER
+
+        share_test_runtime()
+        food_names = sorted(load_foods())
+        app_path = root / "macro_manager" / "app.py"
+
+        results = []
+        print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MiB':>8}")
+        for n in args.sessions:
+            level = run_level(app_path, food_names, n, args.iterations)
+            EXPORT_WORKER.flush()
+            results.append(level)
+            rss = level["peak_rss_mib"]
+            print(
+                f"{n:>8} {level['reruns']:>7} {level['reruns_per_s']:>8.1f} {level['p50_ms']:>8.1f} "
+                f"{level['p95_ms']:>8.1f} {level['p99_ms']:>8.1f} {'n/a' if rss is None else f'{rss:.1f}':>8}"
+            )
+            for phase, stats in level["phases"].items():
+                print(f"{'':>8} {phase:<10} p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}")
+    if args.out:
+        args.out.write_text(json.dumps({"iterations": args.iterations, "levels": results}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
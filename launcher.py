@@ -1,22 +1,21 @@
 # launcher.py
-import sys, os, subprocess
+import sys, os
+
+from macro_manager.launch import launch, mark_launch
 
 def main():
+    mark_launch()
     # Locate the “dist/launcher” folder when frozen,
     # otherwise run from the project root
     if getattr(sys, "frozen", False):
         base = sys._MEIPASS
-        python = sys.executable   # this is the exe
     else:
         base = os.path.dirname(__file__)
-        python = sys.executable   # your real venv python
     os.chdir(base)
 
-    # Exactly mirror your run.bat
-    subprocess.call([
-        python, "-m", "streamlit", "run", "app.py",
-        "--server.headless", "true"
-    ])
+    # A frozen sys.executable is this launcher, not a Python interpreter, so
+    # the bundled build always serves Streamlit in-process (pre-warmed).
+    launch(sys.argv[1:], in_process=getattr(sys, "frozen", False))
 
 if __name__ == "__main__":
     main()
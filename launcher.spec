@@ -1,9 +1,16 @@
 # -*- mode: python ; coding: utf-8 -*-
-from PyInstaller.utils.hooks import collect_all
+from PyInstaller.utils.hooks import collect_all, collect_submodules
 
-datas = [('app.py', '.'), ('nutrition.py', '.'), ('foods.yaml', '.'), ('LICENSE.md', '.'), ('meal_today.yaml', '.')]
+datas = [
+    ('macro_manager/app.py', 'macro_manager'),
+    ('nutrition.py', '.'),
+    ('data/foods.yaml', 'data'),
+    ('data/meal_today.yaml', 'data'),
+    ('LICENSE.md', '.'),
+]
 binaries = []
-hiddenimports = ['streamlit.web.cli', 'streamlit.cli']
+# app.py is executed by Streamlit as a script, so its imports are not traced
+hiddenimports = ['streamlit.web.cli', 'streamlit.web.bootstrap'] + collect_submodules('macro_manager')
 tmp_ret = collect_all('streamlit')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
@@ -3,27 +3,41 @@
 This wrapper launches Streamlit with the bundled ``app.py`` so that the
 application runs with full Streamlit context (no ``ScriptRunContext``
 warnings). Additional command-line arguments are forwarded to Streamlit.
+
+``--in-process`` serves the app from this interpreter instead of a child
+``streamlit run``, pre-warming imports, the food cache and the first
+dashboard render beforehand (``--no-prewarm`` skips that); see
+:mod:`macro_manager.launch`.
+
+``macro-manager rerender [options]`` instead regenerates the dashboard images
+of logged days (see :mod:`macro_manager.batch`), and ``macro-manager totals
+MEAL.yaml`` prints a meal's totals as JSON without starting Streamlit (see
+:mod:`macro_manager.summary`), and ``macro-manager import FILE`` bulk-loads a
+USDA-style CSV or JSON nutrient database into the food library (see
+:mod:`macro_manager.importer`).
 """
 
-from pathlib import Path
-import subprocess
 import sys
 
 
 def main() -> None:
     """Execute ``streamlit run`` for the packaged application."""
-    app_path = Path(__file__).with_name("app.py")
-    cmd = [
-        sys.executable,
-        "-m",
-        "streamlit",
-        "run",
-        str(app_path),
-        "--server.headless",
-        "true",
-        *sys.argv[1:],
-    ]
-    subprocess.call(cmd)
+    if sys.argv[1:2] == ["rerender"]:
+        from macro_manager.batch import main as rerender
+
+        sys.exit(rerender(sys.argv[2:]))
+    if sys.argv[1:2] == ["totals"]:
+        from macro_manager.summary import main as totals
+
+        sys.exit(totals(sys.argv[2:]))
+    if sys.argv[1:2] == ["import"]:
+        from macro_manager.importer import main as import_foods
+
+        sys.exit(import_foods(sys.argv[2:]))
+
+    from macro_manager.launch import launch
+
+    launch(sys.argv[1:])
 
 
 if __name__ == "__main__":
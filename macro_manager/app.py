@@ -1,10 +1,26 @@
+import datetime
 import os
+import sys
+import time
+from dataclasses import asdict
+
 import streamlit as st
 from pathlib import Path
 
-from macro_manager.models import Food, Meal
-from macro_manager.db import load_foods, save_foods, load_profile, save_profile
-from macro_manager.plot import build_dashboard_figure, save_dashboard
+from macro_manager.models import Food, FoodTable, Meal
+from macro_manager.export import EXPORT_WORKER
+from macro_manager.launch import report_first_paint
+from macro_manager.db import delete_foods, load_foods, put_food, put_recipe
+from macro_manager.logstore import ROLLUP_METRICS, open_log_store, parse_logged_foods
+from macro_manager.optimize import SUGGEST_MAX_SERVINGS, suggest_servings
+from macro_manager.plot import DashboardRenderer
+from macro_manager.profile_store import PROFILE_STORE
+from macro_manager.render_cache import RENDER_CACHE, dashboard_key
+from macro_manager.search import carry_index, food_index
+from macro_manager.summary import calculate_bmr
+from macro_manager.svg import dashboard_svg
+from macro_manager.tracing import Trace, rerun_trace, span, trace_enabled
+from macro_manager.trends import DEFAULT_MAX_POINTS, downsample_frame
 import pandas as pd
 from streamlit.runtime import runtime
 
@@ -13,6 +29,12 @@ from streamlit.runtime import runtime
 
 _SHUTDOWN_HOOK_INSTALLED = False
 
+# "svg" (default) renders without matplotlib; "matplotlib" uses DashboardRenderer
+DASHBOARD_BACKEND = os.environ.get("MACRO_MANAGER_DASHBOARD_BACKEND", "svg")
+
+# Matches offered by the food pickers; larger libraries are reached by searching
+FOOD_PICKER_LIMIT = 50
+
 
 def install_session_shutdown_hook() -> None:
     global _SHUTDOWN_HOOK_INSTALLED
@@ -26,7 +48,14 @@ def install_session_shutdown_hook() -> None:
 
     def _wrapped_on_disconnect() -> None:
         original()
+        try:
+            PROFILE_STORE.flush()
+        except Exception as exc:
+            # Still drain the export queue below; only the profile edit is lost
+            print(f"macro-manager: could not save the profile: {exc}", file=sys.stderr, flush=True)
         if rt._session_mgr.num_active_sessions() == 0:
+            # os._exit skips atexit handlers, so drain queued saves first
+            EXPORT_WORKER.flush(timeout=60)
             os._exit(0)
 
     rt._on_session_disconnected = _wrapped_on_disconnect
@@ -41,36 +70,70 @@ def rerun_app() -> None:
     rerun()
 
 
-def parse_logged_foods(foods_str: str) -> dict[str, float]:
-    parsed: dict[str, float] = {}
-    for item in foods_str.split("; "):
-        if not item:
-            continue
-        name_part, qty_part = item.rsplit("x", 1)
-        try:
-            parsed[name_part] = float(qty_part)
-        except ValueError:
-            continue
-    return parsed
-
-
-def calculate_bmr(sex: str, weight_kg: float, height_cm: float, age: float) -> float:
-    if not all([sex, weight_kg, height_cm, age]):
-        return 0.0
-    base = 10 * weight_kg + 6.25 * height_cm - 5 * age
-    if sex == "Male":
-        base += 5
-    elif sex == "Female":
-        base -= 161
-    return max(base, 0.0)
+def show_export_status() -> None:
+    """Report the session's queued save once it has finished."""
+    job = st.session_state.get("export_job")
+    if job is None:
+        return
+    if not job.done():
+        st.info("⏳ Saving day to log in the background…")
+        return
+    del st.session_state["export_job"]
+    if job.exception() is not None:
+        st.error(f"Saving failed: {job.exception()}")
+        return
+    paths = job.result()
+    msg = "Updated" if paths.get("replaced") else "Saved"
+    st.success(f"{msg} to {paths['log']}")
+
+
+def render_dashboard_png(meal: Meal, burned_kcal: float, burned_error_kcal: float | None) -> bytes:
+    renderer = st.session_state.get("dashboard_renderer")
+    if renderer is None:
+        renderer = st.session_state["dashboard_renderer"] = DashboardRenderer()
+    renderer.render(meal, burned_kcal, burned_error_kcal=burned_error_kcal)
+    return renderer.to_bytes("png")
+
+
+def sync_meal(meal: Meal | None, foods: FoodTable, servings: dict[str, float]) -> Meal:
+    """Apply only the servings that changed since the previous rerun."""
+    if meal is None or meal.table is not foods:
+        meal = Meal("Today's Intake", table=foods)
+    elif meal.stale:
+        meal.recompute()
+    current = meal.quantities
+    for name in current.keys() - servings.keys():
+        meal.remove(name)
+    for name, qty in servings.items():
+        if current.get(name, 0.0) != qty:
+            meal.set_servings(foods[name], qty)
+    return meal
+
+
+def food_picker(container, label: str, foods: FoodTable, key: str) -> list[str]:
+    """Multiselect offering the top search matches plus the current picks."""
+    query = container.text_input(
+        "🔍 Search foods", key=f"{key}_query", placeholder="Type to filter the list"
+    )
+    current = st.session_state.get(key, [])
+    picked = [name for name in current if name in foods]
+    if picked != current:
+        st.session_state[key] = picked
+    matches = food_index(foods).search(query, FOOD_PICKER_LIMIT)
+    return container.multiselect(label, list(dict.fromkeys([*picked, *matches])), key=key)
 
 
 # ────────────────────────── Sidebar CRUD UI ───────────────────
 
-def manage_foods_ui(foods: dict[str, Food]) -> dict[str, Food]:
-    """Render UI to add/edit/delete foods. Return potentially mutated dict."""
+def manage_foods_ui(foods: FoodTable) -> FoodTable:
+    """Render UI to add/edit/delete foods.
+
+    Edits are journaled through :mod:`macro_manager.db`, which publishes an
+    updated library; the rerun that follows each edit loads it.
+    """
     with st.sidebar.expander("🛠️ Manage Foods", expanded=False):
-        action = st.radio("Select action", ["Add", "Edit", "Delete", "None"], index=3)
+        action = st.radio("Select action", ["Add", "Edit", "Recipe", "Delete", "None"], index=4)
+    index = food_index(foods)
 
     def food_form(defaults: dict | None = None):
         defaults = defaults or {}
@@ -101,40 +164,98 @@ def manage_foods_ui(foods: dict[str, Food]) -> dict[str, Food]:
                 elif vals["name"] in foods:
                     st.error("Food already exists – try Edit instead.")
                 else:
-                    foods[vals["name"]] = Food(**vals)
-                    save_foods(foods)
+                    edited = put_food(foods, Food(**vals))
+                    carry_index(foods, edited).add(vals["name"])
                     st.success(f"Added {vals['name']}")
                     rerun_app()
 
     elif action == "Edit":
-        target = st.selectbox("Select food to edit", sorted(foods.keys()))
+        query = st.text_input("🔍 Search foods", key="edit_query", placeholder="Type to filter the list")
+        target = st.selectbox("Select food to edit", index.search(query, FOOD_PICKER_LIMIT))
+        if target is None:
+            st.info("No matching foods.")
+            return foods
+        if target in foods.recipes:
+            st.caption("Saving nutrients here turns this recipe into a plain food.")
         with st.form("edit_form"):
-            vals = food_form({**foods[target].__dict__})
+            vals = food_form(asdict(foods[target]))
             if st.form_submit_button("💾 Save Changes"):
-                foods[target] = Food(**vals)
-                save_foods(foods)
+                carry_index(foods, put_food(foods, Food(**vals)))
                 st.success(f"Updated {target}")
                 rerun_app()
 
+    elif action == "Recipe":
+        name = st.text_input("Recipe name", key="recipe_name").strip()
+        existing = foods.recipes.get(name, {})
+        if existing:
+            st.caption("Current: " + ", ".join(f"{k} × {v:g}" for k, v in existing.items()))
+        parts = food_picker(st, "Ingredients", foods, key="recipe_parts")
+        servings = {
+            part: st.number_input(
+                f"{part} servings", 0.0, value=float(existing.get(part, 1.0)), step=0.25, key=f"recipe_{part}"
+            )
+            for part in parts
+        }
+        if st.button("🍳 Save Recipe", disabled=not (name and parts)):
+            try:
+                edited = put_recipe(foods, name, servings)
+            except ValueError as exc:
+                st.error(str(exc))
+            else:
+                carry_index(foods, edited).add(name)
+                st.success(f"Saved recipe {name}")
+                rerun_app()
+
     elif action == "Delete":
-        victims = st.multiselect("Select foods to delete", sorted(foods.keys()))
+        victims = food_picker(st, "Select foods to delete", foods, key="delete_selection")
         if st.button("🗑️ Delete Selected", disabled=not victims):
-            for v in victims:
-                foods.pop(v, None)
-            save_foods(foods)
+            index = carry_index(foods, delete_foods(foods, victims))
+            for name in victims:
+                index.remove(name)
             st.success(f"Deleted {', '.join(victims)}")
             rerun_app()
 
     return foods
 
+
 # ────────────────────────── Main App ─────────────────────────
 
+
+def show_trace_panel(trace: Trace) -> None:
+    """Sidebar table of this rerun's spans (only rendered while tracing)."""
+    with st.sidebar.expander("🐞 Rerun timings", expanded=False):
+        rows = [
+            {
+                "span": "  " * s.depth + s.name,
+                "start (ms)": round(s.start_ms, 2),
+                "ms": round(s.ms, 2),
+                **({} if s.alloc_kib is None else {"alloc (KiB)": round(s.alloc_kib, 1)}),
+            }
+            for s in trace.spans
+        ]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+
 def main():
+    started = time.perf_counter()
+    with rerun_trace(trace_enabled(st.query_params.get("trace"))) as trace:
+        render_page()
+    report_first_paint(time.perf_counter() - started)
+    if trace is not None:
+        show_trace_panel(trace)
+
+
+def render_page():
     st.set_page_config(page_title="Macro Dashboard", page_icon="📊", layout="wide")
     install_session_shutdown_hook()
 
     foods = load_foods()
-    foods = manage_foods_ui(foods)  # May mutate dict via sidebar
+    with span("app.manage_foods_ui"):
+        foods = manage_foods_ui(foods)
+
+    with span("log.dates"):
+        log_store = open_log_store(Path(__file__).resolve().parent)
+        log_dates = log_store.dates()
 
     tab_dash, tab_trend = st.tabs(["Dashboard", "Trends"])
 
@@ -143,35 +264,45 @@ def main():
         st.caption("⬅️ Use the sidebar to build your meal and manage foods.")
 
         st.sidebar.header("🥗 Build Your Meal")
-        log_path = Path(__file__).resolve().parent / "macro_log.csv"
-        if log_path.exists():
-            df_log = pd.read_csv(log_path, parse_dates=["datetime"])
-            if not df_log.empty:
-                df_log["date"] = df_log["datetime"].dt.date
-                load_date = st.sidebar.selectbox(
-                    "Load previous day",
-                    sorted(df_log["date"].unique(), reverse=True),
+        if log_dates:
+            load_date = st.sidebar.selectbox("Load previous day", log_dates)
+            if st.sidebar.button("📥 Load day into meal builder"):
+                row = log_store.get(load_date) or {}
+                logged_foods = parse_logged_foods(row.get("foods") or "")
+                available_foods = [name for name in logged_foods if name in foods]
+                missing_foods = sorted(set(logged_foods) - set(available_foods))
+                st.session_state["selected_foods"] = available_foods
+                for name, qty in logged_foods.items():
+                    if name in foods:
+                        st.session_state[f"serving_{name}"] = qty
+                if missing_foods:
+                    st.sidebar.warning(
+                        "Missing foods not found in your library: "
+                        f"{', '.join(missing_foods)}"
+                    )
+
+        if st.sidebar.button(
+            "🎯 Suggest servings",
+            help="Servings of the selected foods (or, with none selected, a few "
+            "foods from the whole library) closest to the dashboard targets, "
+            f"at most {SUGGEST_MAX_SERVINGS:g} of each.",
+        ):
+            picked = [name for name in st.session_state.get("selected_foods", []) if name in foods]
+            with span("optimize.suggest"):
+                plan = suggest_servings(
+                    foods, picked or None, max_foods=len(picked) or 8, max_servings=SUGGEST_MAX_SERVINGS
                 )
-                if st.sidebar.button("📥 Load day into meal builder"):
-                    row = df_log.loc[df_log["date"] == load_date].iloc[-1]
-                    logged_foods = parse_logged_foods(row.get("foods", ""))
-                    available_foods = [name for name in logged_foods if name in foods]
-                    missing_foods = sorted(set(logged_foods) - set(available_foods))
-                    st.session_state["selected_foods"] = available_foods
-                    for name, qty in logged_foods.items():
-                        if name in foods:
-                            st.session_state[f"serving_{name}"] = qty
-                    if missing_foods:
-                        st.sidebar.warning(
-                            "Missing foods not found in your library: "
-                            f"{', '.join(missing_foods)}"
-                        )
-
-        selected = st.sidebar.multiselect(
-            "Select foods",
-            sorted(foods.keys()),
-            key="selected_foods",
-        )
+            if plan.servings:
+                st.session_state["selected_foods"] = picked or list(plan.servings)
+                for name in st.session_state["selected_foods"]:
+                    st.session_state[f"serving_{name}"] = plan.servings.get(name, 0.0)
+                st.sidebar.caption(
+                    f"Suggested plan: {plan.kcal:.0f} kcal in {plan.seconds * 1e3:.0f} ms"
+                )
+            else:
+                st.sidebar.info("No servings of these foods get closer to the targets.")
+
+        selected = food_picker(st.sidebar, "Select foods", foods, key="selected_foods")
         servings = {
             name: st.sidebar.number_input(
                 f"{name} servings",
@@ -183,13 +314,12 @@ def main():
             for name in selected
         }
 
-        meal = Meal("Today's Intake")
-        for name, qty in servings.items():
-            if qty:
-                meal.add(foods[name], qty)
+        with span("app.sync_meal"):
+            meal = sync_meal(st.session_state.get("meal"), foods, servings)
+        st.session_state["meal"] = meal
 
         st.sidebar.header("🔥 Burned Calories")
-        profile = load_profile()
+        profile = PROFILE_STORE.get()
         with st.sidebar.expander("Profile (auto-saved)", expanded=False):
             sex_options = ["", "Female", "Male"]
             sex_default = profile.get("sex", "")
@@ -209,8 +339,8 @@ def main():
             "height_cm": height_cm,
             "weight_kg": weight_kg,
         }
-        if profile_payload != profile:
-            save_profile(profile_payload)
+        # Written in the background once the inputs stop changing
+        PROFILE_STORE.put(profile_payload)
 
         bmr = calculate_bmr(sex, weight_kg, height_cm, age)
         base_burn_kcal = bmr * 1.2
@@ -255,23 +385,34 @@ def main():
         burned_error_kcal = workout_error_kcal or None
 
         if st.button("💾 Save Day to Log"):
-            paths = save_dashboard(
+            st.session_state["export_job"] = EXPORT_WORKER.submit(
                 meal,
                 burned_kcal=burned_kcal,
                 base_burn_kcal=base_burn_kcal,
                 workout_adjust_kcal=workout_adjust_kcal,
                 workout_error_kcal=burned_error_kcal or 0.0,
                 weight_kg=weight_kg,
+                store=log_store,
+                when=datetime.datetime.now(),
             )
-            msg = "Updated" if paths.get("replaced") else "Saved"
-            st.success(f"{msg} to {paths['csv']}")
-
-        fig, totals, total_kcal = build_dashboard_figure(
-            meal,
-            burned_kcal,
-            burned_error_kcal=burned_error_kcal,
-        )
-        st.pyplot(fig, use_container_width=True)
+        show_export_status()
+
+        with span("meal.totals"):
+            totals = meal.totals
+            total_kcal = meal.calories or 1e-6
+        if DASHBOARD_BACKEND == "matplotlib":
+            render = lambda: render_dashboard_png(meal, burned_kcal, burned_error_kcal)  # noqa: E731
+            fmt = "png"
+        else:
+            render = lambda: dashboard_svg(meal, burned_kcal, burned_error_kcal)  # noqa: E731
+            fmt = "svg"
+        with span("dashboard.render"):
+            image = RENDER_CACHE.get_or_render(
+                dashboard_key(totals, total_kcal, burned_kcal, burned_error_kcal, fmt),
+                render,
+            )
+        with span("dashboard.transfer"):
+            st.image(image, use_container_width=True)
 
         with st.expander("Nutrient Totals", expanded=True):
             stats = {
@@ -283,18 +424,7 @@ def main():
             st.table(stats)
 
     with tab_trend:
-        log_path = Path(__file__).resolve().parent / "macro_log.csv"
-        if log_path.exists():
-            df = pd.read_csv(log_path, parse_dates=["datetime"])
-            df = df.sort_values("datetime")
-            for col in [
-                "burned_calories",
-                "net_calories",
-                "base_burn_calories",
-                "workout_adjust_calories",
-            ]:
-                if col not in df:
-                    df[col] = 0.0
+        if log_dates:
             st.subheader("Macro Trends")
             metrics = {
                 "Total Calories": "calories",
@@ -309,9 +439,46 @@ def main():
                 list(metrics.keys()),
                 default=list(metrics.keys()),
             )
-            df_idx = df.set_index("datetime")
-            for label in selected:
-                st.line_chart(df_idx[[metrics[label]]], height=200, use_container_width=True)
+            date_range = st.date_input(
+                "Date range",
+                value=(log_dates[-1], log_dates[0]),
+                min_value=log_dates[-1],
+                max_value=log_dates[0],
+            )
+            aggregations = {
+                "Daily": None,
+                "7-day average": "rolling_7",
+                "30-day average": "rolling_30",
+                "Weekly mean": "weekly",
+                "Monthly mean": "monthly",
+            }
+            aggregation = st.radio("Aggregation", list(aggregations), horizontal=True)
+            start, end = (tuple(date_range) + (None, None))[:2]
+            kind = aggregations[aggregation]
+            with span("log.range"):
+                if kind is None:
+                    df = log_store.range(start, end, columns=[metrics[label] for label in selected])
+                    df_idx = df.set_index("datetime")
+                else:
+                    dropped = [label for label in selected if metrics[label] not in ROLLUP_METRICS]
+                    if dropped:
+                        st.caption(f"{aggregation} is not available for: {', '.join(dropped)}")
+                    selected = [label for label in selected if label not in dropped]
+                    df_idx = log_store.rollups(kind, start, end).set_index("period")
+            df_idx = df_idx.fillna({metrics[label]: 0.0 for label in selected})
+            max_points = st.number_input(
+                "Max points per chart",
+                min_value=50,
+                value=DEFAULT_MAX_POINTS,
+                step=50,
+                help="Long histories are downsampled (LTTB) to about this many points.",
+            )
+            columns = [metrics[label] for label in selected]
+            with span("trends.downsample"):
+                chart = downsample_frame(df_idx, columns, int(max_points))
+                chart = chart[columns].rename(columns={metrics[label]: label for label in selected})
+            with span("trends.transfer"):
+                st.line_chart(chart, height=400, use_container_width=True)
         else:
             st.info("No log file found. Save your meals to start tracking.")
 
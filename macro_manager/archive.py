@@ -0,0 +1,202 @@
+"""Year-partitioned columnar archive for the macro log.
+
+Each calendar year lives in its own directory with one ``.npy`` file per
+numeric column (plus ``datetime.npy`` and ``foods.json``)::
+
+    macro_log.archive/
+        2023/datetime.npy  calories.npy  protein_g.npy  ...  foods.json
+        2024/...
+
+Trend queries memory-map only the requested columns of the partitions that
+overlap the requested date range, so their cost follows the size of the
+answer rather than the size of the history. Results are copied out of the
+maps, so no file stays open once a query returns.
+
+A year is rewritten by staging ``YYYY.new`` and swapping it in through
+``YYYY.old``; a swap interrupted by a crash is rolled back the next time the
+archive is read.
+"""
+
+import datetime
+import json
+import os
+import shutil
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+from .logstore import LOG_COLUMNS, NUMERIC_COLUMNS, DateLike, LogStore, dated_rows, day_key
+
+# Held while a partition is swapped or recovered, so recovery never removes
+# a staging directory another thread is still writing
+_PARTITION_LOCK = threading.RLock()
+
+
+class ArchiveLogStore(LogStore):
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+    # ── partitions ────────────────────────────────────────────
+    def _recover(self) -> None:
+        """Undo partition swaps interrupted by a crash.
+
+        A missing ``YYYY`` is restored from ``YYYY.old``; leftover ``.old``
+        and ``.new`` directories are removed.
+        """
+        with _PARTITION_LOCK:
+            for stray in sorted(self.path.glob("*.old")) + sorted(self.path.glob("*.new")):
+                part = stray.with_suffix("")
+                if stray.suffix == ".old" and not part.exists():
+                    os.replace(stray, part)
+                else:
+                    shutil.rmtree(stray, ignore_errors=True)
+
+    def years(self) -> list[int]:
+        self._recover()
+        return sorted(int(p.name) for p in self.path.iterdir() if p.is_dir() and p.name.isdigit())
+
+    def _partition(self, year: int) -> Path:
+        return self.path / f"{year:04d}"
+
+    def _load_column(self, year: int, column: str, mmap: bool = True) -> np.ndarray:
+        return np.load(self._partition(year) / f"{column}.npy", mmap_mode="r" if mmap else None)
+
+    def _load_partition(self, year: int) -> dict[str, list]:
+        """Every column of one year as row-aligned lists (used by writers)."""
+        self._recover()
+        part = self._partition(year)
+        if not part.exists():
+            return {c: [] for c in LOG_COLUMNS}
+        data = {"datetime": self._load_column(year, "datetime", mmap=False).tolist()}
+        for column in NUMERIC_COLUMNS:
+            data[column] = self._load_column(year, column, mmap=False).tolist()
+        data["foods"] = json.loads((part / "foods.json").read_text())
+        return data
+
+    def _write_partition(self, year: int, data: dict[str, list]) -> None:
+        order = np.argsort(np.asarray(data["datetime"], dtype="datetime64[s]"), kind="stable")
+        part = self._partition(year)
+        staging = part.with_name(part.name + ".new")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        np.save(staging / "datetime.npy", np.asarray(data["datetime"], dtype="datetime64[s]")[order])
+        for column in NUMERIC_COLUMNS:
+            values = np.asarray(
+                [np.nan if v is None else v for v in data[column]], dtype=float
+            )
+            np.save(staging / f"{column}.npy", values[order])
+        foods = [data["foods"][i] for i in order]
+        (staging / "foods.json").write_text(json.dumps(foods, ensure_ascii=False))
+        # Swap the staged partition in. A crash between the two renames
+        # leaves only ``.old`` (and ``.new``), which _recover() rolls back.
+        retired = part.with_name(part.name + ".old")
+        if part.exists():
+            os.replace(part, retired)
+        os.replace(staging, part)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    # ── LogStore API ──────────────────────────────────────────
+    def upsert_many(self, rows: Iterable[dict]) -> int:
+        """Write ``rows`` rewriting each touched year once; return replacements."""
+        by_year: dict[int, list[dict]] = defaultdict(list)
+        for row in rows:
+            by_year[int(day_key(row["datetime"])[:4])].append(row)
+        with _PARTITION_LOCK:
+            return sum(self._upsert_year(year, year_rows) for year, year_rows in by_year.items())
+
+    def _upsert_year(self, year: int, year_rows: list[dict]) -> int:
+        replaced = 0
+        data = self._load_partition(year)
+        index = {
+            str(np.datetime64(ts, "D")): i for i, ts in enumerate(data["datetime"])
+        }
+        for row in year_rows:
+            day = day_key(row["datetime"])
+            values = {
+                "datetime": np.datetime64(row["datetime"], "s"),
+                **{c: row.get(c) for c in NUMERIC_COLUMNS},
+                "foods": row.get("foods") if isinstance(row.get("foods"), str) else None,
+            }
+            i = index.get(day)
+            if i is None:
+                index[day] = len(data["datetime"])
+                for c in LOG_COLUMNS:
+                    data[c].append(values[c])
+            else:
+                replaced += 1
+                for c in LOG_COLUMNS:
+                    data[c][i] = values[c]
+        self._write_partition(year, data)
+        return replaced
+
+    def upsert(self, row: dict) -> bool:
+        return self.upsert_many([row]) > 0
+
+    def dates(self) -> list[datetime.date]:
+        out: list[datetime.date] = []
+        for year in reversed(self.years()):
+            stamps = self._load_column(year, "datetime").astype("datetime64[D]")
+            out.extend(reversed(stamps.tolist()))
+        return out
+
+    def get(self, day: DateLike) -> dict | None:
+        key = np.datetime64(day_key(day), "D")
+        year = int(day_key(day)[:4])
+        if not self._partition(year).exists():
+            return None
+        stamps = self._load_column(year, "datetime").astype("datetime64[D]")
+        i = int(np.searchsorted(stamps, key))
+        if i >= len(stamps) or stamps[i] != key:
+            return None
+        record = {"datetime": self._load_column(year, "datetime")[i].item().isoformat()}
+        for column in NUMERIC_COLUMNS:
+            value = float(self._load_column(year, column)[i])
+            record[column] = None if np.isnan(value) else value
+        foods = json.loads((self._partition(year) / "foods.json").read_text())
+        record["foods"] = foods[i]
+        return record
+
+    def range(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        columns = [c for c in (columns or LOG_COLUMNS) if c != "datetime"]
+        lo = np.datetime64(day_key(start), "D") if start is not None else None
+        hi = np.datetime64(day_key(end), "D") if end is not None else None
+        frames = []
+        for year in self.years():
+            if (lo is not None and year < lo.astype(object).year) or (
+                hi is not None and year > hi.astype(object).year
+            ):
+                continue  # partition pruned without being opened
+            stamps = self._load_column(year, "datetime")
+            days = stamps.astype("datetime64[D]")
+            first = int(np.searchsorted(days, lo)) if lo is not None else 0
+            last = int(np.searchsorted(days, hi, side="right")) if hi is not None else len(days)
+            if first >= last:
+                continue
+            # Copy out of the maps so no partition file stays open (Windows
+            # cannot replace a directory holding a mapped file)
+            frame = {"datetime": np.array(stamps[first:last], copy=True)}
+            for column in columns:
+                if column == "foods":
+                    foods = json.loads((self._partition(year) / "foods.json").read_text())
+                    frame[column] = foods[first:last]
+                else:
+                    frame[column] = np.array(self._load_column(year, column)[first:last], copy=True)
+            frames.append(pd.DataFrame(frame))
+        if not frames:
+            return pd.DataFrame(
+                {"datetime": pd.Series(dtype="datetime64[s]"), **{c: [] for c in columns}}
+            )
+        return pd.concat(frames, ignore_index=True)
+
+
+def migrate_to_archive(source: LogStore, archive: ArchiveLogStore) -> int:
+    """Copy every dated row of ``source`` into ``archive``; return the row count."""
+    rows = dated_rows(source.rows(), source.path)
+    archive.upsert_many(rows)
+    return len(rows)
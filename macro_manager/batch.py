@@ -0,0 +1,145 @@
+"""Batch re-rendering of logged days' dashboards (``macro-manager rerender``)."""
+
+import argparse
+import io
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Mapping
+
+from .db import FOODS_YAML, atomic_write, load_foods
+from .logstore import DateLike, LogStore, open_log_store, parse_logged_foods
+from .models import Food, Meal
+
+# (day, foods string, burned kcal) for one logged row
+DayJob = tuple[str, str | None, float]
+
+# Per-process state set up once by _init_worker
+_WORKER: dict = {}
+
+
+def rehydrate_meal(foods_str: str | None, foods: Mapping[str, Food], name: str = "Meal") -> tuple[Meal, list[str]]:
+    """Rebuild a logged ``foods`` string into a :class:`Meal` against ``foods``.
+
+    Returns the meal and the logged names missing from the library (skipped).
+    """
+    meal = Meal(name)
+    missing = []
+    for food_name, servings in parse_logged_foods(foods_str or "").items():
+        food = foods.get(food_name)
+        if food is None:
+            missing.append(food_name)
+        else:
+            meal.add(food, servings)
+    return meal, missing
+
+
+def _init_worker(foods_path: Path, out_dir: Path, fmt: str, dpi: int) -> None:
+    _WORKER.clear()
+    _WORKER.update(foods=load_foods(foods_path), out_dir=out_dir, fmt=fmt, dpi=dpi, renderer=None)
+
+
+def _render_day(job: DayJob) -> tuple[str, list[str]]:
+    day, foods_str, burned = job
+    meal, missing = rehydrate_meal(foods_str, _WORKER["foods"], name=day)
+    fmt = _WORKER["fmt"]
+    if fmt == "svg":
+        from .svg import dashboard_svg
+
+        data = dashboard_svg(meal, burned).encode("utf-8")
+    else:
+        if _WORKER["renderer"] is None:
+            from .plot import DashboardRenderer
+
+            _WORKER["renderer"] = DashboardRenderer()
+        fig, _, _ = _WORKER["renderer"].render(meal, burned)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=_WORKER["dpi"], transparent=True)
+        data = buf.getvalue()
+    atomic_write(_WORKER["out_dir"] / f"macro_dashboard_{day}.{fmt}", data)
+    return day, missing
+
+
+def _day_jobs(store: LogStore, start: DateLike | None, end: DateLike | None) -> list[DayJob]:
+    df = store.range(start, end, columns=["burned_calories", "foods"])
+    jobs = []
+    for when, foods_str, burned in zip(df["datetime"], df["foods"], df["burned_calories"]):
+        foods_str = foods_str if isinstance(foods_str, str) else None
+        burned = 0.0 if burned is None or math.isnan(burned) else float(burned)
+        jobs.append((when.date().isoformat(), foods_str, burned))
+    return jobs
+
+
+def rerender_days(
+    store: LogStore,
+    out_dir: Path,
+    start: DateLike | None = None,
+    end: DateLike | None = None,
+    workers: int | None = None,
+    fmt: str = "png",
+    dpi: int = 200,
+    foods_path: Path = FOODS_YAML,
+) -> dict:
+    """Re-render the dashboard of every logged day in ``[start, end]`` into ``out_dir``.
+
+    Files are named ``macro_dashboard_YYYY-MM-DD.<fmt>`` and replaced
+    atomically. Days are spread over ``workers`` processes (default: CPU
+    count; 1 renders in-process). Returns the day count, elapsed seconds,
+    days/sec and the library names missing per day.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    jobs = _day_jobs(store, start, end)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    init_args = (Path(foods_path), out_dir, fmt, dpi)
+    if workers == 1:
+        _init_worker(*init_args)
+        missing = {day: names for day, names in map(_render_day, jobs) if names}
+        _WORKER.clear()
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = pool.map(_render_day, jobs, chunksize=chunksize)
+            missing = {day: names for day, names in results if names}
+    elapsed = time.perf_counter() - t0
+    return {
+        "days": len(jobs),
+        "seconds": elapsed,
+        "days_per_sec": len(jobs) / elapsed if elapsed else 0.0,
+        "workers": workers,
+        "missing": missing,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="macro-manager rerender",
+        description="Regenerate dashboard images for logged days.",
+    )
+    parser.add_argument("--start", help="first day (YYYY-MM-DD), default: oldest logged day")
+    parser.add_argument("--end", help="last day (YYYY-MM-DD), default: newest logged day")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--out", type=Path, default=None, help="output directory (default: <log-dir>/dashboards)")
+    parser.add_argument("--format", choices=["png", "svg", "pdf"], default="png")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--log-dir", type=Path, default=Path(__file__).resolve().parent)
+    parser.add_argument("--backend", choices=["sqlite", "archive", "csv"], default=None)
+    parser.add_argument("--foods", type=Path, default=FOODS_YAML, help="food library YAML")
+    args = parser.parse_args(argv)
+
+    store = open_log_store(args.log_dir, backend=args.backend)
+    out_dir = args.out or args.log_dir / "dashboards"
+    report = rerender_days(
+        store, out_dir, args.start, args.end,
+        workers=args.workers, fmt=args.format, dpi=args.dpi, foods_path=args.foods,
+    )
+    for day, names in sorted(report["missing"].items()):
+        print(f"{day}: not in food library, skipped: {', '.join(names)}")
+    print(
+        f"Rendered {report['days']} days to {out_dir} in {report['seconds']:.2f}s "
+        f"({report['days_per_sec']:.1f} days/s, {report['workers']} workers)"
+    )
+    return 0
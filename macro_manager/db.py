@@ -1,47 +1,380 @@
 from pathlib import Path
+import json
+import os
+import threading
+import warnings
+from typing import Iterable, Mapping
+import numpy as np
 import yaml
-from .models import Food
+from .models import Food, FoodTable
+from .schema import (
+    FOODS_YAML,
+    NUTRIENTS,
+    PROFILE_YAML,
+    SNAPSHOT_HEADER,
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_VERSION,
+    journal_path,
+    parse_snapshot,
+    read_journal,
+    read_snapshot,
+    snapshot_path,
+    yaml_stamp,
+)
+from .tracing import traced
 
-# Base directory of the project
-BASE_DIR = Path(__file__).resolve().parents[1]
-DATA_DIR = BASE_DIR / "data"
-FOODS_YAML = DATA_DIR / "foods.yaml"
-PROFILE_YAML = DATA_DIR / "profile.yaml"
+# libyaml bindings are an order of magnitude faster when available
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
+# Process-wide food library cache: resolved path -> ((mtime_ns, size), table).
+# Shared by every Streamlit session, so the tables are read-only; put_food,
+# put_recipe and delete_foods publish an edited copy once it is journaled.
+_FOODS_CACHE: dict[Path, tuple[tuple[int, int], FoodTable]] = {}
+_FOODS_CACHE_LOCK = threading.RLock()
+_FOODS_CACHE_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
 
-def load_foods(path: Path = FOODS_YAML) -> dict[str, Food]:
+
+# Food edits are appended to foods.yaml.journal (JSON lines) and folded back
+# into the YAML once this many entries have accumulated.
+JOURNAL_COMPACT_THRESHOLD = 256
+_JOURNAL_LENGTHS: dict[Path, int] = {}
+
+
+def _stat_key(path: Path) -> tuple[int, int, int, int]:
+    st = path.stat()
+    try:
+        jst = journal_path(path).stat()
+    except FileNotFoundError:
+        return st.st_mtime_ns, st.st_size, 0, 0
+    return st.st_mtime_ns, st.st_size, jst.st_mtime_ns, jst.st_size
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` via a synced temp file and rename."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_food_snapshot(
+    foods: Mapping[str, Food], path: Path = FOODS_YAML, stamp: tuple[int, int] | None = None
+) -> Path:
+    """Write the compiled binary sidecar for the library stored at ``path``.
+
+    ``stamp`` is the :func:`~macro_manager.schema.yaml_stamp` of the YAML the
+    library was read from (default: the YAML as it is now).
+    """
+    size, mtime_ns = stamp or yaml_stamp(path)
+    names = list(foods)
+    matrix = np.zeros((len(names), len(NUTRIENTS)), dtype="<f8")
+    for row, name in enumerate(names):
+        matrix[row] = foods[name].vector
+    blob = "\0".join(names).encode("utf-8")
+    recipes = getattr(foods, "recipes", None)
+    recipe_blob = json.dumps(recipes, ensure_ascii=False).encode("utf-8") if recipes else b""
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        len(NUTRIENTS),
+        len(names),
+        len(blob),
+        len(recipe_blob),
+        size,
+        mtime_ns,
+    )
+    target = snapshot_path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(header)
+        f.write(matrix.tobytes())
+        f.write(blob)
+        f.write(recipe_blob)
+    os.replace(tmp, target)
+    return target
+
+
+def _try_write_snapshot(foods: Mapping[str, Food], path: Path, stamp: tuple[int, int] | None = None) -> None:
+    try:
+        write_food_snapshot(foods, path, stamp)
+    except OSError as exc:
+        # The YAML stays authoritative; the next load parses it again
+        warnings.warn(f"could not write the food snapshot for {path}: {exc}")
+
+
+def read_food_snapshot(path: Path = FOODS_YAML) -> FoodTable | None:
+    """Read the sidecar for ``path`` if it is valid and matches the YAML's size and mtime.
+
+    The returned table's matrix is a read-only view of the file's bytes; it
+    is copied only when the table is first mutated.
+    """
+    buf = read_snapshot(path)
+    try:
+        layout = parse_snapshot(buf, yaml_stamp(path)) if buf is not None else None
+    except (OSError, ValueError):
+        return None
+    if layout is None:
+        return None
+    names, recipes = layout
+    matrix = np.frombuffer(
+        buf, dtype="<f8", count=len(names) * len(NUTRIENTS), offset=SNAPSHOT_HEADER.size
+    ).reshape(len(names), len(NUTRIENTS))
+    table = FoodTable.from_matrix(names, matrix)
+    # Rows already hold the flattened recipes; only the graph is needed
+    for name, parts in recipes.items():
+        table._link(name, parts)
+    return table
+
+
+def _parse_foods(path: Path) -> FoodTable:
+    data = yaml.load(path.read_text(), Loader=_Loader) or {}
+    foods = FoodTable(
+        (Food.from_dict(name, attrs) for name, attrs in data.items()),
+        capacity=len(data),
+    )
+    # Recipe rows start from their saved nutrients and are re-flattened here,
+    # so hand edits to an ingredient reach every recipe using it
+    for name, attrs in data.items():
+        if attrs.get("recipe"):
+            try:
+                foods.set_recipe(name, attrs["recipe"])
+            except ValueError as exc:
+                warnings.warn(f"{path}: {exc}; keeping its saved nutrients")
+    return foods
+
+
+def _replay_journal(foods: FoodTable, path: Path) -> int:
+    """Apply journaled edits on top of ``foods``; return the entry count."""
+    entries = read_journal(path)
+    for entry in entries:
+        if entry["op"] == "put" and "recipe" in entry:
+            foods.set_recipe(entry["name"], entry["recipe"])
+        elif entry["op"] == "put":
+            foods[entry["name"]] = Food.from_dict(entry["name"], entry["food"])
+        elif entry["op"] == "delete":
+            foods.pop(entry["name"], None)
+    return len(entries)
+
+
+def _read_foods(path: Path) -> FoodTable:
+    foods = read_food_snapshot(path)
+    if foods is None:
+        # Stamp before parsing: a YAML edited meanwhile no longer matches
+        stamp = yaml_stamp(path)
+        foods = _parse_foods(path)
+        _try_write_snapshot(foods, path, stamp)
+    _JOURNAL_LENGTHS[path] = _replay_journal(foods, path)
+    return foods
+
+
+@traced()
+def load_foods(path: Path = FOODS_YAML) -> FoodTable:
+    """Return the food library at ``path``, parsing it only when it changed.
+
+    Reads come from the binary snapshot when it is current and fall back to
+    the YAML (recompiling the snapshot) otherwise; pending journal entries
+    are replayed on top. The table is shared by every caller and read-only:
+    edit it with :func:`put_food`, :func:`put_recipe` and
+    :func:`delete_foods`, or work on a ``copy()``.
+    """
     if not path.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text("{}")
-    data = yaml.safe_load(path.read_text()) or {}
-    return {name: Food.from_dict(name, attrs) for name, attrs in data.items()}
+    path = path.resolve()
+    key = _stat_key(path)
+    with _FOODS_CACHE_LOCK:
+        cached = _FOODS_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            _FOODS_CACHE_STATS["hits"] += 1
+            return cached[1]
+        _FOODS_CACHE_STATS["misses"] += 1
+    foods = _read_foods(path)
+    foods.read_only = True
+    with _FOODS_CACHE_LOCK:
+        _FOODS_CACHE[path] = (key, foods)
+    return foods
+
+
+def _journal(foods: FoodTable, entries: list[dict], path: Path) -> None:
+    """Append ``entries`` to the journal, synced, then publish ``foods`` as the cached table."""
+    path = path.resolve()
+    payload = b"".join(
+        json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n" for entry in entries
+    )
+    with _FOODS_CACHE_LOCK:
+        with journal_path(path).open("ab") as f:
+            end = os.fstat(f.fileno()).st_size
+            try:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError:
+                # Drop a partial append: replay stops at the first torn line,
+                # which would hide every entry written after it
+                f.truncate(end)
+                raise
+        length = _JOURNAL_LENGTHS.get(path, 0) + len(entries)
+        _JOURNAL_LENGTHS[path] = length
+        foods.read_only = True
+        _FOODS_CACHE[path] = (_stat_key(path), foods)
+        if length >= JOURNAL_COMPACT_THRESHOLD:
+            try:
+                compact_foods(foods, path)
+            except OSError as exc:
+                # The edit is already durable in the journal; compaction is
+                # retried on the next edit
+                warnings.warn(f"could not compact the food journal for {path}: {exc}")
+
+
+def _edit(foods: FoodTable, path: Path, change) -> FoodTable:
+    """Apply ``change`` to a copy of the library and journal it; return the copy.
+
+    ``change`` edits the copy and returns its journal entries. The copy only
+    replaces the cached table once the entries are on disk, so a failed write
+    leaves every session with the library as persisted. It is taken of the
+    table cached for ``path`` (``foods`` if none is), so edits from different
+    sessions build on each other.
+    """
+    path = path.resolve()
+    with _FOODS_CACHE_LOCK:
+        cached = _FOODS_CACHE.get(path)
+        base = cached[1] if cached is not None else foods
+        table = base.copy()
+        entries = change(table)
+        if not entries:
+            return base
+        _journal(table, entries, path)
+    return table
 
 
-def foods_to_yaml(foods: dict[str, Food]) -> dict:
+def _put_entries(foods: FoodTable, names: Iterable[str]) -> list[dict]:
+    """Journal entries holding the current state of ``names``.
+
+    Recipe entries carry their flattened nutrients as well, so readers that
+    do not rebuild the graph (``macro-manager totals``) stay correct.
+    """
+    entries = []
+    for name, attrs in foods_to_yaml({name: foods[name] for name in names}).items():
+        recipe = foods.recipes.get(name)
+        entry = {"op": "put", "name": name, "food": attrs}
+        if recipe is not None:
+            entry["recipe"] = recipe
+        entries.append(entry)
+    return entries
+
+
+@traced()
+def put_food(foods: FoodTable, food: Food, path: Path = FOODS_YAML) -> FoodTable:
+    """Journal ``food`` as added or replaced; return the updated library.
+
+    Recipes made from it are re-flattened and journaled too.
+    """
+
+    def change(table: FoodTable) -> list[dict]:
+        table[food.name] = food
+        return _put_entries(table, [food.name, *(r for r in table.downstream(food.name) if r in table)])
+
+    return _edit(foods, path, change)
+
+
+@traced()
+def put_recipe(
+    foods: FoodTable, name: str, parts: Mapping[str, float], path: Path = FOODS_YAML
+) -> FoodTable:
+    """Journal ``name`` as a recipe of ``{food: servings}``; return the updated library."""
+
+    def change(table: FoodTable) -> list[dict]:
+        table.set_recipe(name, parts)
+        return _put_entries(table, [name, *(r for r in table.downstream(name) if r in table)])
+
+    return _edit(foods, path, change)
+
+
+@traced()
+def delete_foods(foods: FoodTable, names: Iterable[str], path: Path = FOODS_YAML) -> FoodTable:
+    """Journal the removal of ``names``; return the updated library."""
+
+    def change(table: FoodTable) -> list[dict]:
+        entries = []
+        affected: set[str] = set()
+        for name in names:
+            if table.pop(name, None) is not None:
+                entries.append({"op": "delete", "name": name})
+                affected.update(table.downstream(name))
+        if entries:
+            # Recipes that used a deleted food lose its contribution
+            entries += _put_entries(table, [r for r in affected if r in table])
+        return entries
+
+    return _edit(foods, path, change)
+
+
+@traced()
+def compact_foods(foods: FoodTable, path: Path = FOODS_YAML) -> None:
+    """Fold the journal into ``path`` by rewriting it atomically.
+
+    ``foods`` becomes the cached (read-only) library for ``path``.
+    """
+    with _FOODS_CACHE_LOCK:
+        save_foods(foods, path)
+        path = path.resolve()
+        foods.read_only = True
+        _FOODS_CACHE[path] = (_stat_key(path), foods)
+
+
+def invalidate_foods_cache(path: Path | None = None) -> None:
+    """Drop the cached library for ``path`` (or every path when ``None``)."""
+    with _FOODS_CACHE_LOCK:
+        if path is None:
+            _FOODS_CACHE.clear()
+        else:
+            _FOODS_CACHE.pop(path.resolve(), None)
+        _FOODS_CACHE_STATS["invalidations"] += 1
+
+
+def foods_cache_stats() -> dict[str, int]:
+    with _FOODS_CACHE_LOCK:
+        return {**_FOODS_CACHE_STATS, "entries": len(_FOODS_CACHE)}
+
+
+def foods_to_yaml(foods: Mapping[str, Food]) -> dict:
     out = {}
-    for food in foods.values():
-        attrs = {
-            k: getattr(food, k)
-            for k in (
-                "protein",
-                "fat",
-                "carb",
-                "fiber",
-                "add_sugar",
-                "sodium",
-                "potassium",
-            )
-        }
-        out[food.name] = {k: v for k, v in attrs.items() if v}
+    for name, food in foods.items():
+        attrs = dict(zip(NUTRIENTS, food.vector.tolist()))
+        out[name] = {k: v for k, v in attrs.items() if v}
     return out
 
 
-def save_foods(foods: dict[str, Food], path: Path = FOODS_YAML) -> None:
+def _library_yaml(foods: Mapping[str, Food]) -> dict:
+    """:func:`foods_to_yaml` plus a ``recipe`` mapping of ingredient servings.
+
+    Recipes keep their flattened nutrients, for readers that ignore the graph.
+    """
+    data = foods_to_yaml(foods)
+    for name, parts in getattr(foods, "recipes", {}).items():
+        if name in data and parts:
+            data[name]["recipe"] = dict(parts)
+    return data
+
+
+@traced()
+def save_foods(foods: Mapping[str, Food], path: Path = FOODS_YAML) -> None:
+    """Write the whole library to ``path`` atomically and clear its journal."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w") as f:
-        yaml.safe_dump(foods_to_yaml(foods), f, sort_keys=True)
+    text = yaml.dump(_library_yaml(foods), Dumper=_Dumper, sort_keys=True)
+    atomic_write(path, text.encode("utf-8"))
+    # The YAML now holds every journaled edit; replaying them again is harmless
+    # (puts and deletes are absolute) if we die before the unlink.
+    journal_path(path).unlink(missing_ok=True)
+    _JOURNAL_LENGTHS.pop(path.resolve(), None)
+    invalidate_foods_cache(path)
+    _try_write_snapshot(foods, path)
 
 
+@traced()
 def load_profile(path: Path = PROFILE_YAML) -> dict:
     if not path.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -49,7 +382,7 @@ def load_profile(path: Path = PROFILE_YAML) -> dict:
     return yaml.safe_load(path.read_text()) or {}
 
 
+@traced()
 def save_profile(profile: dict, path: Path = PROFILE_YAML) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w") as f:
-        yaml.safe_dump(profile, f, sort_keys=True)
+    atomic_write(path, yaml.safe_dump(profile, sort_keys=True).encode("utf-8"))
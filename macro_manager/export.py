@@ -0,0 +1,51 @@
+"""Background worker that runs :func:`macro_manager.plot.save_dashboard` off the request path."""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from .models import Meal
+from .plot import save_dashboard
+
+
+class ExportWorker:
+    """Runs dashboard exports on one background thread, in submission order.
+
+    A single thread keeps log writes serialized (two saves of the same day
+    cannot interleave) and is enough because each job is dominated by PNG
+    encoding and file I/O.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="macro-export")
+        self._pending: set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, meal: Meal, **kwargs) -> Future:
+        """Queue ``save_dashboard(meal, **kwargs)``; return its status handle.
+
+        ``meal`` is snapshotted first so later edits in the session cannot
+        change what gets written.
+        """
+        future = self._executor.submit(save_dashboard, meal.snapshot(), **kwargs)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for every queued export; return False if ``timeout`` expired."""
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+
+EXPORT_WORKER = ExportWorker()
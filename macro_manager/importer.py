@@ -0,0 +1,266 @@
+"""Streaming bulk import of nutrient databases (``macro-manager import``).
+
+Reads USDA-style exports without holding them in memory:
+
+* CSV with one food per row (e.g. SR Legacy ``ABBREV``); column headers are
+  matched against :data:`CSV_COLUMNS` or an explicit ``--map``.
+* FoodData Central JSON, either one food object per line or the bulk
+  download (``{"FoundationFoods": [...]}``), whose food array is decoded one
+  object at a time. Nutrients are matched by USDA nutrient number.
+
+Parsed rows are merged into the library in batches with
+:meth:`FoodTable.put_many` and the library is written once at the end.
+Values are stored as given by the source (usually per 100 g).
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Mapping, TextIO
+
+import numpy as np
+
+from .db import load_foods, save_foods
+from .models import FoodTable
+from .schema import FOODS_YAML, NUTRIENTS
+
+BATCH_SIZE = 5000
+_CHUNK = 1 << 20
+
+# Header spellings tried for each nutrient, compared case-insensitively
+CSV_COLUMNS: dict[str, tuple[str, ...]] = {
+    "name": ("name", "description", "shrt_desc", "long_desc", "food"),
+    "protein": ("protein", "protein_(g)", "protein (g)"),
+    "fat": ("fat", "lipid_tot_(g)", "total lipid (fat) (g)", "fat (g)"),
+    "carb": ("carb", "carbohydrt_(g)", "carbohydrate, by difference (g)", "carbohydrate (g)"),
+    "fiber": ("fiber", "fiber_td_(g)", "fiber, total dietary (g)", "fiber (g)"),
+    "add_sugar": ("add_sugar", "sugars, added (g)", "added sugar (g)"),
+    "sodium": ("sodium", "sodium_(mg)", "sodium, na (mg)", "sodium (mg)"),
+    "potassium": ("potassium", "potassium_(mg)", "potassium, k (mg)", "potassium (mg)"),
+}
+
+# USDA nutrient numbers (``nutrient.number`` in FoodData Central JSON)
+USDA_NUTRIENT_NUMBERS: dict[str, str] = {
+    "protein": "203",
+    "fat": "204",
+    "carb": "205",
+    "fiber": "291",
+    "add_sugar": "539",
+    "sodium": "307",
+    "potassium": "306",
+}
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    imported: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _number(value: object) -> float:
+    try:
+        return float(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _resolve_columns(header: list[str], mapping: Mapping[str, str] | None) -> dict[str, str]:
+    """Map ``name`` and each nutrient onto a header in ``header``."""
+    by_lower = {h.strip().lower(): h for h in header}
+    columns = {}
+    for field, candidates in CSV_COLUMNS.items():
+        if mapping and field in mapping:
+            if mapping[field] not in header:
+                raise ValueError(f"column {mapping[field]!r} for {field} not in the CSV header")
+            columns[field] = mapping[field]
+            continue
+        for candidate in candidates:
+            if candidate in by_lower:
+                columns[field] = by_lower[candidate]
+                break
+    if "name" not in columns:
+        raise ValueError("no food name column found; pass --map name=COLUMN")
+    return columns
+
+
+def iter_csv(f: TextIO, mapping: Mapping[str, str] | None = None) -> Iterator[tuple[str, list[float]]]:
+    """Yield ``(name, nutrient values)`` for each CSV row."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _resolve_columns(header, mapping)
+    name_at = header.index(columns["name"])
+    value_at = [header.index(columns[k]) if k in columns else None for k in NUTRIENTS]
+    for row in reader:
+        if len(row) <= name_at:
+            yield "", []
+            continue
+        yield row[name_at].strip(), [
+            _number(row[i]) if i is not None and i < len(row) else 0.0 for i in value_at
+        ]
+
+
+_BY_NUMBER = {number: key for key, number in USDA_NUTRIENT_NUMBERS.items()}
+
+
+def _fdc_food(obj: dict) -> tuple[str, list[float]]:
+    values = dict.fromkeys(NUTRIENTS, 0.0)
+    for entry in obj.get("foodNutrients", ()):
+        nutrient = entry.get("nutrient") or {}
+        key = _BY_NUMBER.get(str(nutrient.get("number", entry.get("nutrientNumber", ""))))
+        if key is not None:
+            values[key] = _number(entry.get("amount", entry.get("value")))
+    return str(obj.get("description", "")).strip(), [values[k] for k in NUTRIENTS]
+
+
+def _json_objects(f: TextIO) -> Iterator[dict]:
+    """Decode the objects of the first JSON array in ``f`` one at a time."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = -1
+    while pos < 0:
+        more = f.read(_CHUNK)
+        if not more:
+            return
+        buf += more
+        pos = buf.find("[")
+    pos += 1
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            obj, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Object cut off at the end of the buffer: keep its tail, read on
+            more = f.read(_CHUNK)
+            if not more:
+                if pos >= len(buf):
+                    return
+                raise
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        yield obj
+
+
+def iter_json(f: TextIO, lines: bool = False) -> Iterator[tuple[str, list[float]]]:
+    """Yield ``(name, nutrient values)`` from FoodData Central JSON.
+
+    With ``lines`` the input holds one food object per line; otherwise the
+    first JSON array in the file (the food list) is streamed.
+    """
+    if lines:
+        for line in f:
+            if line.strip():
+                yield _fdc_food(json.loads(line))
+    else:
+        for obj in _json_objects(f):
+            yield _fdc_food(obj)
+
+
+def import_foods(
+    rows: Iterator[tuple[str, list[float]]],
+    foods: FoodTable,
+    path: Path = FOODS_YAML,
+    replace: bool = True,
+    batch_size: int = BATCH_SIZE,
+    progress=None,
+) -> ImportStats:
+    """Merge ``rows`` into a copy of ``foods`` in batches and save it once.
+
+    Existing foods are overwritten unless ``replace`` is False, in which case
+    a name repeated within the input also keeps its first row. Rows without
+    a name are skipped. ``progress`` is called with the running stats after
+    each batch.
+    """
+    stats = ImportStats()
+    t0 = time.perf_counter()
+    foods = foods.copy()
+    names: list[str] = []
+    pending: set[str] = set()  # names in the unflushed batch
+    values = np.empty((batch_size, len(NUTRIENTS)))
+
+    def flush() -> None:
+        foods.put_many(names, values[: len(names)])
+        stats.imported += len(names)
+        names.clear()
+        pending.clear()
+        stats.seconds = time.perf_counter() - t0
+        if progress is not None:
+            progress(stats)
+
+    for name, vector in rows:
+        stats.rows += 1
+        if not name or (not replace and (name in foods or name in pending)):
+            stats.skipped += 1
+            continue
+        values[len(names)] = vector
+        names.append(name)
+        pending.add(name)
+        if len(names) == batch_size:
+            flush()
+    if names:
+        flush()
+    if stats.imported:
+        save_foods(foods, path)
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def _mapping(items: list[str]) -> dict[str, str]:
+    mapping = {}
+    for item in items:
+        field, sep, column = item.partition("=")
+        if not sep or field not in CSV_COLUMNS:
+            raise argparse.ArgumentTypeError(f"bad --map {item!r}; use FIELD=COLUMN with FIELD in {list(CSV_COLUMNS)}")
+        mapping[field] = column
+    return mapping
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="macro-manager import", description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="CSV, JSON or JSON-lines file")
+    parser.add_argument("--format", choices=["csv", "json", "jsonl"],
+                        help="input format (default: from the file extension)")
+    parser.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                        help="CSV column for a food field, e.g. protein=Protein_(g)")
+    parser.add_argument("--skip-existing", action="store_true", help="keep foods already in the library")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--foods", type=Path, default=FOODS_YAML, help="food library YAML")
+    args = parser.parse_args(argv)
+    try:
+        mapping = _mapping(args.map)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    fmt = args.format or {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json"}.get(args.source.suffix.lower(), "csv")
+
+    def report(stats: ImportStats) -> None:
+        print(f"{stats.rows:>10,} rows  {stats.rows_per_sec:>10,.0f} rows/s", file=sys.stderr, flush=True)
+
+    with args.source.open(encoding="utf-8-sig", newline="") as f:
+        rows = iter_csv(f, mapping) if fmt == "csv" else iter_json(f, lines=fmt == "jsonl")
+        try:
+            stats = import_foods(rows, load_foods(args.foods), args.foods, replace=not args.skip_existing,
+                                 batch_size=args.batch_size, progress=report)
+        except ValueError as exc:
+            print(f"macro-manager import: {exc}", file=sys.stderr)
+            return 1
+    print(json.dumps({**asdict(stats), "rows_per_sec": stats.rows_per_sec}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Streamlit start-up for ``python -m macro_manager`` and ``launcher.py``.
+
+The default launch runs ``streamlit run`` in a child interpreter. The
+in-process launch boots the Streamlit server in the current interpreter
+after pre-warming it: the heavy modules are imported, the food cache is
+filled and the first dashboard is rendered into the render cache, so the
+first browser session does none of that work. Either way the time from
+launch to the first completed script run is reported on stderr.
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).with_name("app.py")
+
+# Wall-clock launch time (time.time()), inherited by a child Streamlit process
+LAUNCH_ENV = "MACRO_MANAGER_LAUNCH_TS"
+
+_FIRST_PAINT_REPORTED = False
+
+
+def mark_launch() -> None:
+    os.environ.setdefault(LAUNCH_ENV, repr(time.time()))
+
+
+def _log(message: str) -> None:
+    print(f"macro-manager: {message}", file=sys.stderr, flush=True)
+
+
+def report_first_paint(run_seconds: float) -> float | None:
+    """Log seconds since launch the first time it is called in this process.
+
+    ``run_seconds`` is how long that first script run's ``main()`` took; the
+    rest is server start-up, the app's module imports (done by
+    :func:`prewarm` in an in-process launch) and the wait for a browser to
+    connect.
+    """
+    global _FIRST_PAINT_REPORTED
+    launched = os.environ.get(LAUNCH_ENV)
+    if _FIRST_PAINT_REPORTED or launched is None:
+        return None
+    _FIRST_PAINT_REPORTED = True
+    elapsed = time.time() - float(launched)
+    _log(f"first paint {elapsed:.2f}s after launch (first script run {run_seconds:.2f}s)")
+    return elapsed
+
+
+def prewarm() -> dict[str, float]:
+    """Do the first session's cold-start work now; return seconds per step."""
+    timings = {}
+    t0 = time.perf_counter()
+
+    def step(name: str) -> None:
+        nonlocal t0
+        now = time.perf_counter()
+        timings[name] = now - t0
+        t0 = now
+
+    # Everything app.py imports (streamlit, pandas, yaml, the log stores, ...)
+    app = importlib.import_module("macro_manager.app")
+    if app.DASHBOARD_BACKEND == "matplotlib":
+        importlib.import_module("matplotlib.backends.backend_agg")
+    step("imports")
+
+    from .db import load_foods
+    from .logstore import open_log_store
+    from .search import food_index
+
+    food_index(load_foods())
+    open_log_store(APP_PATH.parent).dates()
+    step("data")
+
+    # The first page shows an empty meal against the profile's base burn
+    from .models import Meal
+    from .profile_store import PROFILE_STORE
+    from .render_cache import RENDER_CACHE, dashboard_key
+    from .summary import calculate_bmr
+
+    profile = PROFILE_STORE.get()
+    burned = calculate_bmr(
+        profile.get("sex", ""),
+        float(profile.get("weight_kg", 0)),
+        float(profile.get("height_cm", 0)),
+        float(profile.get("age", 0)),
+    ) * 1.2
+    meal = Meal("Today's Intake")
+    if app.DASHBOARD_BACKEND == "matplotlib":
+        from .plot import DashboardRenderer
+
+        fmt = "png"
+        renderer = DashboardRenderer()
+        renderer.render(meal, burned)
+        image = renderer.to_bytes(fmt)
+        renderer.close()
+    else:
+        fmt = "svg"
+        image = app.dashboard_svg(meal, burned)
+    RENDER_CACHE.put(dashboard_key(meal.totals, meal.calories or 1e-6, burned, None, fmt), image)
+    step("render")
+    return timings
+
+
+def run_subprocess(args: list[str]) -> int:
+    """``streamlit run`` the app in a child interpreter."""
+    mark_launch()
+    cmd = [sys.executable, "-m", "streamlit", "run", str(APP_PATH), "--server.headless", "true", *args]
+    return subprocess.call(cmd)
+
+
+def run_in_process(args: list[str], warm: bool = True) -> int:
+    """Pre-warm (unless ``warm`` is False) and serve the app from this interpreter."""
+    mark_launch()
+    if warm:
+        timings = prewarm()
+        _log("prewarm " + ", ".join(f"{name} {secs:.2f}s" for name, secs in timings.items()))
+    from streamlit.web import cli as stcli
+
+    flags = ["--server.headless", "true"]
+    if getattr(sys, "frozen", False):
+        # Frozen builds have no source checkout, which development mode expects
+        flags += ["--global.developmentMode", "false"]
+    sys.argv = ["streamlit", "run", str(APP_PATH), *flags, *args]
+    return stcli.main()
+
+
+def launch(args: list[str], in_process: bool = False) -> None:
+    """Start the app; ``--in-process`` and ``--no-prewarm`` in ``args`` pick the mode."""
+    in_process = in_process or "--in-process" in args
+    warm = "--no-prewarm" not in args
+    args = [a for a in args if a not in ("--in-process", "--no-prewarm")]
+    if in_process:
+        run_in_process(args, warm=warm)
+    else:
+        run_subprocess(args)
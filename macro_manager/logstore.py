@@ -0,0 +1,625 @@
+"""Storage backends for the daily macro log (one row per calendar date)."""
+
+import csv
+import datetime
+import io
+import json
+import os
+import sqlite3
+import threading
+import warnings
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, Union
+
+import pandas as pd
+
+LOG_COLUMNS = [
+    "datetime",
+    "calories",
+    "burned_calories",
+    "base_burn_calories",
+    "workout_adjust_calories",
+    "workout_error_calories",
+    "net_calories",
+    "weight_kg",
+    "protein_g",
+    "fat_g",
+    "carb_g",
+    "fiber_g",
+    "added_sugar_g",
+    "sodium_mg",
+    "potassium_mg",
+    "foods",
+]
+NUMERIC_COLUMNS = LOG_COLUMNS[1:-1]
+
+# Aggregates offered by the Trends tab: trailing calendar-day windows ending
+# on each logged date, and Monday-based weeks / calendar months.
+ROLLUP_METRICS = ["calories", "burned_calories", "net_calories", "protein_g", "fat_g", "carb_g"]
+ROLLUP_WINDOWS = {"rolling_7": 7, "rolling_30": 30}
+ROLLUP_KINDS = [*ROLLUP_WINDOWS, "weekly", "monthly"]
+
+DateLike = Union[datetime.date, str]
+
+
+def day_key(value: DateLike) -> str:
+    """Normalise a date or ISO date/datetime string to ``YYYY-MM-DD``.
+
+    Raises ValueError for anything without a valid date (``None``, ``NaT``,
+    blank or malformed strings).
+    """
+    day = (value.isoformat() if isinstance(value, datetime.date) else str(value))[:10]
+    try:
+        valid = datetime.date.fromisoformat(day).isoformat() == day
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"not a date: {value!r}")
+    return day
+
+
+def dated_rows(rows: Iterable[dict], source: object) -> list[dict]:
+    """The ``rows`` whose ``datetime`` holds a valid date.
+
+    The rest are dropped with a warning that counts them and names ``source``.
+    """
+    kept, skipped = [], 0
+    for row in rows:
+        try:
+            day_key(row["datetime"])
+        except ValueError:
+            skipped += 1
+        else:
+            kept.append(row)
+    if skipped:
+        warnings.warn(f"skipped {skipped} row(s) of {source} without a valid date", stacklevel=2)
+    return kept
+
+
+def _period_bounds(kind: str, day: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """First and last date of the weekly/monthly period containing ``day``."""
+    if kind == "weekly":
+        first = day - datetime.timedelta(days=day.weekday())
+        return first, first + datetime.timedelta(days=6)
+    first = day.replace(day=1)
+    following = (first + datetime.timedelta(days=32)).replace(day=1)
+    return first, following - datetime.timedelta(days=1)
+
+
+def compute_rollups(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """Aggregate daily rows (``datetime`` + metric columns) into ``kind``.
+
+    Returns a frame with a ``period`` column (window end date for rolling
+    kinds, period start otherwise), the day count ``n`` and metric means.
+    """
+    if kind not in ROLLUP_KINDS:
+        raise ValueError(f"Unknown rollup kind: {kind!r}")
+    metrics = [c for c in df.columns if c != "datetime"]
+    daily = df.assign(period=pd.to_datetime(df["datetime"]).dt.normalize())
+    daily = daily.drop(columns=["datetime"]).set_index("period").sort_index()
+    if kind in ROLLUP_WINDOWS:
+        window = f"{ROLLUP_WINDOWS[kind]}D"
+        out = daily.rolling(window).mean()
+        out.insert(0, "n", daily[metrics[0]].rolling(window).count() if metrics else 0)
+    else:
+        freq = "W-MON" if kind == "weekly" else "MS"
+        grouped = daily.groupby(pd.Grouper(freq=freq, label="left", closed="left"))
+        out = grouped.mean()
+        out.insert(0, "n", grouped.size())
+        out = out[out["n"] > 0]
+    return out.reset_index()
+
+
+def format_logged_foods(items: Iterable) -> str:
+    return "; ".join(f"{f.name}x{q}" for f, q in items)
+
+
+def parse_logged_foods(foods_str: str) -> dict[str, float]:
+    parsed: dict[str, float] = {}
+    for item in foods_str.split("; "):
+        if not item:
+            continue
+        name_part, qty_part = item.rsplit("x", 1)
+        try:
+            parsed[name_part] = float(qty_part)
+        except ValueError:
+            continue
+    return parsed
+
+
+class LogStore(ABC):
+    """Interface shared by the log backends.
+
+    Rows are plain dicts keyed by :data:`LOG_COLUMNS`; the calendar date of
+    ``row["datetime"]`` is the primary key, so saving a day twice replaces it.
+    """
+
+    path: Path
+
+    @abstractmethod
+    def upsert(self, row: dict) -> bool:
+        """Insert or replace the row for its date; return True if replaced."""
+
+    @abstractmethod
+    def dates(self) -> list[datetime.date]:
+        """Logged dates, newest first."""
+
+    @abstractmethod
+    def get(self, day: DateLike) -> dict | None:
+        """The row logged for ``day``, if any."""
+
+    @abstractmethod
+    def range(
+        self,
+        start: DateLike | None = None,
+        end: DateLike | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        """Rows with ``start <= date <= end`` ordered by date.
+
+        The result always has a parsed ``datetime`` column followed by
+        ``columns`` (all columns when ``None``).
+        """
+
+    def rollups(
+        self,
+        kind: str,
+        start: DateLike | None = None,
+        end: DateLike | None = None,
+    ) -> pd.DataFrame:
+        """Aggregates of :data:`ROLLUP_METRICS` (see :func:`compute_rollups`).
+
+        Backends without materialized rollups compute them from the raw rows.
+        """
+        out = compute_rollups(self.range(columns=ROLLUP_METRICS), kind)
+        if start is not None:
+            out = out[out["period"] >= pd.Timestamp(day_key(start))]
+        if end is not None:
+            out = out[out["period"] <= pd.Timestamp(day_key(end))]
+        return out.reset_index(drop=True)
+
+    def rows(self) -> Iterator[dict]:
+        df = self.range()
+        for record in df.to_dict("records"):
+            record["datetime"] = record["datetime"].isoformat()
+            yield record
+
+
+def csv_index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+# Loaded date indexes by CSV path: (CSV size, mtime_ns) they describe, index
+_CSV_INDEXES: dict[Path, tuple[tuple[int, int], dict]] = {}
+_CSV_INDEX_LOCK = threading.RLock()
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _scan_csv(path: Path) -> dict:
+    """Build the date index of ``path`` with one pass over its bytes.
+
+    A record is a physical line plus any continuation lines while a quoted
+    field is open; later records for a date win, as in :meth:`CsvLogStore.get`.
+    """
+    days: dict[str, list[int]] = {}
+    duplicates = False
+    header: list[str] = []
+    with path.open("rb") as f:
+        offset = 0
+        record, start = b"", 0
+        for line in f:
+            if not record:
+                start = offset
+            record += line
+            offset += len(line)
+            if record.count(b'"') % 2:
+                continue  # quoted field spans lines
+            fields = next(csv.reader([record.decode("utf-8")]), [])
+            record = b""
+            if not header:
+                header = fields
+                continue
+            if not fields or "datetime" not in header:
+                continue
+            try:
+                day = day_key(fields[header.index("datetime")])
+            except ValueError:
+                continue
+            duplicates = duplicates or day in days
+            days[day] = [start, offset - start]
+    return {"header": header, "days": days, "duplicates": duplicates}
+
+
+class CsvLogStore(LogStore):
+    """The original ``macro_log.csv`` format with a byte-offset date index.
+
+    ``macro_log.csv.idx`` maps each date to the byte span of its row, so
+    :meth:`dates` reads only the index and :meth:`get` is one seek and read
+    whatever the size of the log. :meth:`upsert` keeps the index current:
+    a new day is appended and a replaced day is spliced out (through a temp
+    file and rename, so a failed write keeps the old row) without parsing
+    the CSV. The index
+    records the CSV's size and mtime; if the CSV was changed by anything
+    else it is rebuilt with one scan.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.index_path = csv_index_path(self.path)
+
+    def _read(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return pd.DataFrame(columns=["datetime", "date", *(columns or [])])
+        usecols = None
+        if columns is not None:
+            wanted = {"datetime", *columns}
+            usecols = lambda c: c in wanted  # noqa: E731
+        df = pd.read_csv(self.path, usecols=usecols, parse_dates=["datetime"])
+        df["date"] = df["datetime"].dt.date
+        return df
+
+    # ── date index ────────────────────────────────────────────
+    def _index(self) -> dict | None:
+        """The current index, from memory, the sidecar or a rescan (None if no log)."""
+        stamp = _stamp(self.path)
+        if stamp is None or stamp[0] == 0:
+            return None
+        key = self.path.resolve()
+        cached = _CSV_INDEXES.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        try:
+            index = json.loads(self.index_path.read_bytes())
+            if tuple(index["stamp"]) != stamp:
+                index = None
+        except (OSError, ValueError, KeyError, TypeError):
+            index = None
+        if index is None:
+            index = _scan_csv(self.path)
+            self._save_index(index)
+        else:
+            _CSV_INDEXES[key] = (stamp, index)
+        return index
+
+    def _save_index(self, index: dict) -> None:
+        stamp = _stamp(self.path)
+        index["stamp"] = list(stamp)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(index, separators=(",", ":")))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass  # the index is only an accelerator; rebuilt next time
+        _CSV_INDEXES[self.path.resolve()] = (stamp, index)
+
+    def _encode(self, row: dict, header: list[str]) -> bytes:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator=os.linesep).writerow(
+            ["" if row.get(c) is None else row[c] for c in header]
+        )
+        return buf.getvalue().encode("utf-8")
+
+    def _rewrite(self, row: dict) -> bool:
+        """Full pandas rewrite, for a new column set or duplicate dates."""
+        df = pd.read_csv(self.path)
+        df["date"] = pd.to_datetime(df["datetime"]).dt.date
+        today = pd.to_datetime(row["datetime"]).date()
+        replaced = today in df["date"].values
+        df = df[df["date"] != today].drop(columns=["date"])
+        pd.concat([df, pd.DataFrame([row])], ignore_index=True).to_csv(self.path, index=False)
+        return replaced
+
+    def upsert(self, row: dict) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        day = day_key(row["datetime"])
+        with _CSV_INDEX_LOCK:
+            index = self._index()
+            if index is None:
+                header = list(row)
+                head = self._encode(dict(zip(header, header)), header)
+                record = self._encode(row, header)
+                self.path.write_bytes(head + record)
+                self._save_index({"header": header, "days": {day: [len(head), len(record)]}, "duplicates": False})
+                return False
+            if index["duplicates"] or not set(row) <= set(index["header"]):
+                replaced = self._rewrite(row)
+                self._save_index(_scan_csv(self.path))
+                return replaced
+
+            record = self._encode(row, index["header"])
+            # Work on a copy: the cached index must keep describing the file
+            # until the write below has succeeded
+            days = {d: list(span) for d, span in index["days"].items()}
+            entry = days.pop(day, None)
+            size = self.path.stat().st_size
+            if entry is not None:
+                # Replace a row: splice it out, append the new one
+                offset, length = entry
+                data = self.path.read_bytes()
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_bytes(data[:offset] + data[offset + length :] + record)
+                os.replace(tmp, self.path)
+                for span in days.values():
+                    if span[0] > offset:
+                        span[0] -= length
+                days[day] = [size - length, len(record)]
+            else:
+                with self.path.open("r+b") as f:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        f.write(os.linesep.encode())
+                        size += len(os.linesep)
+                    f.seek(size)
+                    f.write(record)
+                days[day] = [size, len(record)]
+            self._save_index({**index, "days": days})
+            return entry is not None
+
+    def dates(self) -> list[datetime.date]:
+        with _CSV_INDEX_LOCK:
+            index = self._index()
+            days = list(index["days"]) if index is not None else []
+        return sorted((datetime.date.fromisoformat(d) for d in days), reverse=True)
+
+    def get(self, day: DateLike) -> dict | None:
+        with _CSV_INDEX_LOCK:
+            index = self._index()
+            entry = index["days"].get(day_key(day)) if index is not None else None
+            if entry is None:
+                return None
+            with self.path.open("rb") as f:
+                f.seek(entry[0])
+                raw = f.read(entry[1]).decode("utf-8")
+        values = next(csv.reader([raw]))
+        record: dict = {}
+        for column, value in zip(index["header"], values):
+            if column in NUMERIC_COLUMNS:
+                record[column] = float(value) if value != "" else None
+            else:
+                record[column] = value or None
+        record["datetime"] = datetime.datetime.fromisoformat(record["datetime"]).isoformat()
+        return record
+
+    def range(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        df = self._read(columns)
+        if start is not None:
+            df = df[df["date"] >= datetime.date.fromisoformat(day_key(start))]
+        if end is not None:
+            df = df[df["date"] <= datetime.date.fromisoformat(day_key(end))]
+        df = df.sort_values("datetime").drop(columns=["date"])
+        if columns is not None:
+            df = df.reindex(columns=["datetime", *columns])
+        return df.reset_index(drop=True)
+
+
+class SqliteLogStore(LogStore):
+    """SQLite-backed log with the date as primary key.
+
+    Saving a day is a single indexed upsert and trend queries are index
+    range scans, so neither depends on how much history is stored.  The
+    ``rollup`` table holds materialized :data:`ROLLUP_KINDS` aggregates; each
+    upsert refreshes only the windows and periods that contain the saved day.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            cols = ", ".join(f"{c} REAL" for c in NUMERIC_COLUMNS)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS macro_log ("
+                f"date TEXT PRIMARY KEY, datetime TEXT NOT NULL, {cols}, foods TEXT)"
+            )
+            rollup_columns = [r[1] for r in conn.execute("PRAGMA table_info(rollup)")]
+            if rollup_columns != ["kind", "period", "n", *ROLLUP_METRICS]:
+                # Missing, or built for an older metric list
+                conn.execute("DROP TABLE IF EXISTS rollup")
+                metrics = ", ".join(f"{c} REAL" for c in ROLLUP_METRICS)
+                conn.execute(
+                    "CREATE TABLE rollup (kind TEXT NOT NULL, period TEXT NOT NULL, "
+                    f"n INTEGER NOT NULL, {metrics}, PRIMARY KEY (kind, period))"
+                )
+                self._refresh_rollups(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call: Streamlit runs sessions on
+        # separate threads and sqlite3 connections must not be shared.
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def _upsert_many(self, conn: sqlite3.Connection, rows: Iterable[dict]) -> None:
+        names = ", ".join(["date", *LOG_COLUMNS])
+        marks = ", ".join("?" * (len(LOG_COLUMNS) + 1))
+        updates = ", ".join(f"{c}=excluded.{c}" for c in LOG_COLUMNS)
+        conn.executemany(
+            f"INSERT INTO macro_log ({names}) VALUES ({marks}) "
+            f"ON CONFLICT(date) DO UPDATE SET {updates}",
+            ([day_key(r["datetime"]), *(r.get(c) for c in LOG_COLUMNS)] for r in rows),
+        )
+
+    def _refresh_rollups(self, conn: sqlite3.Connection, day: str | None = None) -> None:
+        """Recompute the rollups affected by ``day`` (all of them when ``None``)."""
+        names = ", ".join(ROLLUP_METRICS)
+        means = ", ".join(f"AVG(b.{c})" for c in ROLLUP_METRICS)
+        insert = f"INSERT OR REPLACE INTO rollup (kind, period, n, {names}) "
+        for kind, size in ROLLUP_WINDOWS.items():
+            # A day lands in the trailing windows of the next ``size`` days
+            where, params = "", [kind, f"-{size - 1} days"]
+            if day is not None:
+                where = "WHERE a.date BETWEEN ? AND date(?, ?)"
+                params += [day, day, f"+{size - 1} days"]
+            conn.execute(
+                insert + f"SELECT ?, a.date, COUNT(*), {means} FROM macro_log a "
+                "JOIN macro_log b ON b.date BETWEEN date(a.date, ?) AND a.date "
+                f"{where} GROUP BY a.date",
+                params,
+            )
+        for kind in ("weekly", "monthly"):
+            if day is None:
+                days = [d for (d,) in conn.execute("SELECT date FROM macro_log")]
+                periods = {_period_bounds(kind, datetime.date.fromisoformat(d)) for d in days}
+            else:
+                periods = {_period_bounds(kind, datetime.date.fromisoformat(day))}
+            plain = ", ".join(f"AVG({c})" for c in ROLLUP_METRICS)
+            conn.executemany(
+                insert + f"SELECT ?, ?, COUNT(*), {plain} FROM macro_log "
+                "WHERE date BETWEEN ? AND ?",
+                [(kind, first.isoformat(), first.isoformat(), last.isoformat())
+                 for first, last in periods],
+            )
+
+    def upsert(self, row: dict) -> bool:
+        with self._connect() as conn:
+            replaced = (
+                conn.execute(
+                    "SELECT 1 FROM macro_log WHERE date = ?", (day_key(row["datetime"]),)
+                ).fetchone()
+                is not None
+            )
+            self._upsert_many(conn, [row])
+            self._refresh_rollups(conn, day_key(row["datetime"]))
+        return replaced
+
+    def upsert_many(self, rows: Iterable[dict]) -> None:
+        """Bulk upsert (e.g. migrations); rebuilds every rollup once."""
+        with self._connect() as conn:
+            self._upsert_many(conn, rows)
+            self._refresh_rollups(conn)
+
+    def dates(self) -> list[datetime.date]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT date FROM macro_log ORDER BY date DESC").fetchall()
+        return [datetime.date.fromisoformat(d) for (d,) in rows]
+
+    def get(self, day: DateLike) -> dict | None:
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(LOG_COLUMNS)} FROM macro_log WHERE date = ?",
+                (day_key(day),),
+            )
+            row = cur.fetchone()
+        return dict(zip(LOG_COLUMNS, row)) if row is not None else None
+
+    def range(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        columns = [c for c in (columns or LOG_COLUMNS) if c != "datetime"]
+        unknown = set(columns) - set(LOG_COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown log columns: {sorted(unknown)}")
+        where, params = [], []
+        if start is not None:
+            where.append("date >= ?")
+            params.append(day_key(start))
+        if end is not None:
+            where.append("date <= ?")
+            params.append(day_key(end))
+        sql = f"SELECT {', '.join(['datetime', *columns])} FROM macro_log"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql + " ORDER BY date", conn, params=params)
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        return df
+
+    def rollups(self, kind, start=None, end=None) -> pd.DataFrame:
+        if kind not in ROLLUP_KINDS:
+            raise ValueError(f"Unknown rollup kind: {kind!r}")
+        sql = f"SELECT period, n, {', '.join(ROLLUP_METRICS)} FROM rollup WHERE kind = ?"
+        params = [kind]
+        if start is not None:
+            sql += " AND period >= ?"
+            params.append(day_key(start))
+        if end is not None:
+            sql += " AND period <= ?"
+            params.append(day_key(end))
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql + " ORDER BY period", conn, params=params)
+        df["period"] = pd.to_datetime(df["period"])
+        return df
+
+
+def migrate_csv_to_sqlite(csv_path: Union[str, Path], store: SqliteLogStore) -> int:
+    """Copy every row of a legacy ``macro_log.csv`` into ``store``.
+
+    Later rows win when a date appears more than once; rows without a valid
+    date are skipped with a warning. Returns the number of rows copied.
+    """
+    with open(csv_path, newline="") as f:
+        rows = []
+        for raw in csv.DictReader(f):
+            row = {c: raw.get(c) or None for c in LOG_COLUMNS}
+            for c in NUMERIC_COLUMNS:
+                if row[c] is not None:
+                    row[c] = float(row[c])
+            rows.append(row)
+    rows = dated_rows(rows, csv_path)
+    store.upsert_many(rows)
+    return len(rows)
+
+
+# Stores opened by open_log_store, by (resolved directory, backend)
+_LOG_STORES: dict[tuple[Path, str], LogStore] = {}
+_LOG_STORES_LOCK = threading.Lock()
+
+
+def _migrate_once(csv_path: Path, target: Path, migrate) -> None:
+    """Run ``migrate`` for a new ``target`` next to a non-empty CSV log.
+
+    A ``<target>.migrating`` marker is created before the target and removed
+    only once ``migrate`` returns, so a migration that failed or was
+    interrupted is retried the next time the log is opened.
+    """
+    marker = target.with_name(target.name + ".migrating")
+    if not target.exists() and csv_path.exists() and csv_path.stat().st_size > 0:
+        marker.touch()
+    if marker.exists():
+        migrate()
+        marker.unlink()
+
+
+def open_log_store(directory: Union[str, Path], backend: str | None = None) -> LogStore:
+    """Open the log in ``directory`` using ``backend`` ("sqlite", "archive" or "csv").
+
+    The backend defaults to ``$MACRO_MANAGER_LOG_BACKEND`` or "sqlite". The
+    first time a SQLite log or archive is opened next to an existing
+    ``macro_log.csv`` the CSV is migrated into it (the CSV itself is left
+    untouched). Stores are opened once per directory and backend and shared
+    afterwards, so reruns skip the setup.
+    """
+    directory = Path(directory).resolve()
+    backend = backend or os.environ.get("MACRO_MANAGER_LOG_BACKEND", "sqlite")
+    with _LOG_STORES_LOCK:
+        store = _LOG_STORES.get((directory, backend))
+        if store is None:
+            store = _LOG_STORES[(directory, backend)] = _open_log_store(directory, backend)
+    return store
+
+
+def _open_log_store(directory: Path, backend: str) -> LogStore:
+    csv_path = directory / "macro_log.csv"
+    if backend == "csv":
+        return CsvLogStore(csv_path)
+    if backend == "sqlite":
+        db_path = directory / "macro_log.sqlite"
+        _migrate_once(csv_path, db_path, lambda: migrate_csv_to_sqlite(csv_path, SqliteLogStore(db_path)))
+        return SqliteLogStore(db_path)
+    if backend == "archive":
+        from .archive import ArchiveLogStore, migrate_to_archive
+
+        archive_path = directory / "macro_log.archive"
+        _migrate_once(
+            csv_path, archive_path, lambda: migrate_to_archive(CsvLogStore(csv_path), ArchiveLogStore(archive_path))
+        )
+        return ArchiveLogStore(archive_path)
+    raise ValueError(f"Unknown log backend: {backend!r}")
@@ -1,5 +1,12 @@
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .schema import KCAL_FACTORS, NUTRIENTS
+
+KCAL_PER_GRAM = np.array(KCAL_FACTORS)
+
 
 @dataclass
 class Food:
@@ -25,31 +32,387 @@ class Food:
             potassium=float(data.get("potassium", 0)),
         )
 
+    @property
+    def vector(self) -> np.ndarray:
+        return np.array([getattr(self, k) for k in NUTRIENTS], dtype=float)
+
+
+class FoodView(Food):
+    """A :class:`Food` whose nutrients live in one row of a :class:`FoodTable`.
+
+    Views are cheap handles (table, row, name); reading a nutrient reads the
+    matrix, so edits made through the table are visible immediately.
+    """
+
+    def __init__(self, table: "FoodTable", row: int, name: str) -> None:
+        self.name = name
+        self._table = table
+        self._row = row
+
+    @property
+    def vector(self) -> np.ndarray:
+        return self._table.matrix[self._row]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Food):
+            return NotImplemented
+        return self.name == other.name and bool(np.array_equal(self.vector, other.vector))
+
+
+def _nutrient_column(idx: int) -> property:
+    def fget(self: FoodView) -> float:
+        return float(self._table.matrix[self._row, idx])
+
+    def fset(self: FoodView, value: float) -> None:
+        self._table._writable()[self._row, idx] = value
+        self._table._propagate(self.name)
+
+    return property(fget, fset)
+
+
+for _idx, _key in enumerate(NUTRIENTS):
+    setattr(FoodView, _key, _nutrient_column(_idx))
+
+
+class FoodTable(MutableMapping[str, Food]):
+    """Food library stored as one contiguous ``foods x nutrients`` matrix.
+
+    Behaves like ``dict[str, Food]``; values are :class:`FoodView` rows.
+    Deleted foods keep their (zeroed) row so that row numbers handed out to
+    views and meals stay stable for the lifetime of the table.
+
+    Recipes are foods defined as ``{ingredient: servings}`` over other foods
+    (recipes included), forming a DAG. A recipe's row holds its flattened
+    vector; changing a food recomputes only the recipes downstream of it, in
+    dependency order. Missing ingredients count as zero.
+
+    A ``read_only`` table (the shared library from
+    :func:`macro_manager.db.load_foods`) refuses every mutation; edit a
+    :meth:`copy`, or go through :mod:`macro_manager.db`.
+    """
+
+    def __init__(self, foods: Iterable[Food] = (), capacity: int = 0) -> None:
+        self._data = np.zeros((max(capacity, 16), len(NUTRIENTS)))
+        self._size = 0
+        self.index: Dict[str, int] = {}
+        self._views: Dict[str, FoodView] = {}
+        # Bumped on every mutation so dependents (e.g. meals) can spot edits
+        self.version = 0
+        self.read_only = False
+        self.recipes: Dict[str, Dict[str, float]] = {}
+        self._used_by: Dict[str, Set[str]] = {}  # ingredient -> recipes using it
+        for food in foods:
+            self[food.name] = food
+
+    @classmethod
+    def from_matrix(cls, names: List[str], matrix: np.ndarray) -> "FoodTable":
+        """Wrap an existing ``len(names) x len(NUTRIENTS)`` matrix without copying."""
+        table = cls.__new__(cls)
+        table._data = matrix
+        table._size = len(names)
+        table.index = {name: row for row, name in enumerate(names)}
+        table._views = {}
+        table.version = 0
+        table.read_only = False
+        table.recipes = {}
+        table._used_by = {}
+        return table
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._data[: self._size]
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise TypeError("the shared food library is read-only; edit a copy() or use macro_manager.db")
+
+    def _writable(self, rows: int = 0) -> np.ndarray:
+        """Return the backing array for a mutation, copying/growing it if needed."""
+        self._check_writable()
+        self.version += 1
+        needed = self._size + rows
+        if needed > len(self._data) or not self._data.flags.writeable:
+            grown = np.zeros((max(needed, 2 * len(self._data), 16), len(NUTRIENTS)))
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        return self._data
+
+    def row(self, name: str) -> int:
+        return self.index[name]
+
+    def vector_for(self, servings: Mapping[str, float]) -> np.ndarray:
+        """Return a servings vector aligned with the table rows."""
+        vec = np.zeros(self._size)
+        for name, qty in servings.items():
+            vec[self.index[name]] += qty
+        return vec
+
+    def copy(self) -> "FoodTable":
+        table = FoodTable.__new__(FoodTable)
+        table._data = self.matrix.copy()
+        table._size = self._size
+        table.index = dict(self.index)
+        table._views = {}
+        table.version = 0
+        table.read_only = False
+        table.recipes = {name: dict(parts) for name, parts in self.recipes.items()}
+        table._used_by = {name: set(users) for name, users in self._used_by.items()}
+        return table
+
+    def _link(self, name: str, parts: Optional[Mapping[str, float]]) -> None:
+        """Replace the ingredient edges of ``name`` (``None`` makes it a plain food)."""
+        for ingredient in self.recipes.pop(name, {}):
+            users = self._used_by[ingredient]
+            users.discard(name)
+            if not users:
+                del self._used_by[ingredient]
+        if parts is None:
+            return
+        self.recipes[name] = {k: float(v) for k, v in parts.items()}
+        for ingredient in parts:
+            self._used_by.setdefault(ingredient, set()).add(name)
+
+    def downstream(self, name: str) -> List[str]:
+        """Recipes that depend on ``name``, each after all of its ingredients."""
+        seen: Set[str] = set()
+        order: List[str] = []
+
+        def visit(food: str) -> None:
+            for user in self._used_by.get(food, ()):
+                if user not in seen:
+                    seen.add(user)
+                    visit(user)
+                    order.append(user)
+
+        visit(name)
+        # Post-order puts each recipe after everything that uses it
+        order.reverse()
+        return order
+
+    def _flatten(self, data: np.ndarray, name: str) -> None:
+        parts = [(self.index[k], qty) for k, qty in self.recipes[name].items() if k in self.index]
+        if parts:
+            rows, qty = zip(*parts)
+            data[self.index[name]] = np.asarray(qty) @ data[list(rows)]
+        else:
+            data[self.index[name]] = 0.0
+
+    def _propagate(self, name: str) -> None:
+        if name not in self._used_by:
+            return
+        data = self._writable()
+        for recipe in self.downstream(name):
+            if recipe in self.index:
+                self._flatten(data, recipe)
+
+    def set_recipe(self, name: str, parts: Mapping[str, float]) -> None:
+        """Define ``name`` as ``parts`` (``{food: servings}``) and flatten it."""
+        self._check_writable()
+        for part in parts:
+            if part == name or name in self._ingredients(part):
+                raise ValueError(f"recipe {name!r} would contain itself through {part!r}")
+        self._link(name, parts)
+        if name not in self.index:
+            self._writable(1)
+            self.index[name] = self._size
+            self._size += 1
+        data = self._writable()
+        self._flatten(data, name)
+        self._propagate(name)
+
+    def _ingredients(self, name: str) -> Set[str]:
+        """Every food ``name`` is (transitively) made of."""
+        found: Set[str] = set()
+        stack = [name]
+        while stack:
+            for part in self.recipes.get(stack.pop(), ()):
+                if part not in found:
+                    found.add(part)
+                    stack.append(part)
+        return found
+
+    def __getitem__(self, name: str) -> FoodView:
+        view = self._views.get(name)
+        if view is None:
+            view = FoodView(self, self.index[name], name)
+            self._views[name] = view
+        return view
+
+    def __setitem__(self, name: str, food: Food) -> None:
+        self._check_writable()
+        values = food.vector
+        row = self.index.get(name)
+        if row is None:
+            data = self._writable(1)
+            row = self._size
+            self._size += 1
+            self.index[name] = row
+        else:
+            data = self._writable()
+        data[row] = values
+        if name in self.recipes:
+            self._link(name, None)
+        self._propagate(name)
+
+    def put_many(self, names: List[str], matrix: np.ndarray) -> None:
+        """Add or replace ``names`` with the rows of ``matrix`` in one write."""
+        self._check_writable()
+        rows = np.empty(len(names), dtype=np.intp)
+        new = 0
+        for i, name in enumerate(names):
+            row = self.index.get(name)
+            if row is None:
+                row = self._size + new
+                self.index[name] = row
+                new += 1
+            rows[i] = row
+        data = self._writable(new)
+        self._size += new
+        # Later duplicates win, as with repeated assignment
+        data[rows] = matrix
+        for name in names:
+            if name in self.recipes:
+                self._link(name, None)
+        for name in set(names) & self._used_by.keys():
+            self._propagate(name)
+
+    def __delitem__(self, name: str) -> None:
+        self._check_writable()
+        row = self.index.pop(name)
+        self._views.pop(name, None)
+        self._writable()[row] = 0.0
+        self._link(name, None)
+        self._propagate(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.index
+
+
 class Meal:
-    def __init__(self, name: str = "Meal") -> None:
+    """Collection of ``(Food, servings)`` with running nutrient totals.
+
+    ``add``, ``remove`` and ``set_servings`` update the totals in O(1);
+    ``calories``, ``totals`` and ``macro_pct`` are cached until the next
+    change.  With a ``table`` the servings are also held as a vector over the
+    table rows so the totals can be rebuilt with one dot product.
+    """
+
+    def __init__(self, name: str = "Meal", table: Optional[FoodTable] = None) -> None:
         self.name = name
-        self.items: List[Tuple[Food, float]] = []
+        self._entries: Dict[str, Tuple[Food, float]] = {}
+        self._vector = np.zeros(len(NUTRIENTS))
+        self._cache: Dict[str, object] = {}
+        # Table mode: servings are held as a vector over the table's rows
+        self.table = table
+        self._servings = np.zeros(len(table._data)) if table is not None else None
+        self._table_version = table.version if table is not None else 0
+
+    def _servings_vector(self) -> np.ndarray:
+        """Servings vector padded to the table's current row count."""
+        size = len(self.table.matrix)
+        if len(self._servings) < size:
+            self._servings = np.pad(self._servings, (0, len(self.table._data) - len(self._servings)))
+        return self._servings[:size]
+
+    def _apply(self, food: Food, delta: float) -> None:
+        if self.table is not None:
+            self._servings_vector()[self.table.row(food.name)] += delta
+        self._vector += food.vector * delta
+        self._cache.clear()
+
+    @property
+    def items(self) -> List[Tuple[Food, float]]:
+        return list(self._entries.values())
+
+    @property
+    def quantities(self) -> Dict[str, float]:
+        return {name: qty for name, (_, qty) in self._entries.items()}
 
     def add(self, food: Food, servings: float = 1.0) -> None:
-        self.items.append((food, servings))
+        current = self._entries.get(food.name, (food, 0.0))[1]
+        self._apply(food, servings)
+        self._entries[food.name] = (food, current + servings)
+
+    def remove(self, name: str) -> None:
+        food, servings = self._entries.pop(name)
+        if self._entries:
+            self._apply(food, -servings)
+        else:
+            # Reset instead of subtracting so float drift cannot accumulate
+            self.clear()
+
+    def set_servings(self, food: Food, servings: float) -> None:
+        if not servings:
+            if food.name in self._entries:
+                self.remove(food.name)
+            return
+        previous, current = self._entries.get(food.name, (None, 0.0))
+        if previous is not None and previous is not food:
+            self.remove(food.name)
+            current = 0.0
+        if servings != current:
+            self._apply(food, servings - current)
+        self._entries[food.name] = (food, servings)
+
+    def snapshot(self) -> "Meal":
+        """Detached copy holding plain :class:`Food` values (no table)."""
+        meal = Meal(self.name)
+        for food, servings in self._entries.values():
+            meal.add(Food(food.name, *food.vector.tolist()), servings)
+        return meal
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._vector[:] = 0.0
+        if self._servings is not None:
+            self._servings[:] = 0.0
+        self._cache.clear()
+
+    @property
+    def stale(self) -> bool:
+        """True when the backing table was edited since the totals were built."""
+        return self.table is not None and self._table_version != self.table.version
+
+    def recompute(self) -> None:
+        """Rebuild the running totals from scratch (e.g. after a food edit)."""
+        if self.table is not None:
+            self._vector = self._servings_vector() @ self.table.matrix
+            self._table_version = self.table.version
+        else:
+            self._vector = np.zeros(len(NUTRIENTS))
+            for food, n in self._entries.values():
+                self._vector += food.vector * n
+        self._cache.clear()
+
+    @property
+    def vector(self) -> np.ndarray:
+        return self._vector.copy()
 
     @property
     def totals(self) -> Dict[str, float]:
-        totals = {
-            "protein": 0.0,
-            "fat": 0.0,
-            "carb": 0.0,
-            "fiber": 0.0,
-            "add_sugar": 0.0,
-            "sodium": 0.0,
-            "potassium": 0.0,
-        }
-        for food, n in self.items:
-            for k in totals:
-                totals[k] += getattr(food, k) * n
-        return totals
+        if "totals" not in self._cache:
+            self._cache["totals"] = dict(zip(NUTRIENTS, self._vector.tolist()))
+        return dict(self._cache["totals"])
 
     @property
     def calories(self) -> float:
-        t = self.totals
-        return t["protein"] * 4 + t["fat"] * 9 + t["carb"] * 4
+        if "kcal" not in self._cache:
+            self._cache["kcal"] = float(self._vector @ KCAL_PER_GRAM)
+        return self._cache["kcal"]
+
+    @property
+    def macro_pct(self) -> Dict[str, float]:
+        """Share of calories from protein, fat and carbs in percent."""
+        if "pct" not in self._cache:
+            kcal = self.calories or 1e-6
+            energy = self._vector[:3] * KCAL_PER_GRAM[:3]
+            self._cache["pct"] = {
+                k: float(e) / kcal * 100 for k, e in zip(NUTRIENTS[:3], energy)
+            }
+        return dict(self._cache["pct"])
@@ -0,0 +1,174 @@
+"""Serving suggestions that steer a meal onto the dashboard targets.
+
+The goal is the dashboard's: :data:`~macro_manager.plot.CAL_GOAL` kcal
+split per :data:`~macro_manager.plot.MACRO_TARGETS` (which fixes protein, fat
+and carb grams) and the :data:`~macro_manager.plot.MICRO_TARGETS`, where
+sodium and added sugar are limits and fiber and potassium are minimums.
+:func:`suggest_servings` minimises the weighted squared relative deviation
+from those targets over non-negative servings, with accelerated projected
+gradient on the food library's nutrient matrix (NumPy only).
+
+For a whole library only a few foods are useful, so the support is grown
+greedily: the food whose column most reduces the loss is added and the
+servings re-solved on the support, up to ``max_foods`` foods or until no
+food helps. Every step is one ``foods x nutrients`` mat-vec, so 10k+
+candidate foods take milliseconds. Foods whose serving rounds to zero are
+dropped and the rest re-solved before the final rounding.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .models import KCAL_PER_GRAM, FoodTable
+from .plot import CAL_GOAL, MACRO_TARGETS, MICRO_TARGETS
+from .schema import NUTRIENTS
+
+# How each micro target is scored: "max" penalises only excess, "min" only a shortfall
+MICRO_KINDS = {"sodium": "max", "add_sugar": "max", "fiber": "min", "potassium": "min"}
+MAX_ITER = 2000
+# Per-food serving cap the app suggests with, so no single food dominates a plan
+SUGGEST_MAX_SERVINGS = 4.0
+
+
+@dataclass
+class Target:
+    nutrient: str
+    value: float
+    kind: str = "exact"  # "exact", "max" or "min"
+    weight: float = 1.0
+
+
+def default_targets(kcal: float = CAL_GOAL, macro_weight: float = 4.0) -> List[Target]:
+    """The dashboard targets, with macro grams weighted above the micros."""
+    idx = {k: i for i, k in enumerate(NUTRIENTS)}
+    targets = [
+        Target(key, kcal * pct / 100 / KCAL_PER_GRAM[idx[key]], "exact", macro_weight)
+        for _, pct, key, _ in MACRO_TARGETS
+    ]
+    targets += [Target(key, float(value), MICRO_KINDS[key]) for _, value, key, _, _ in MICRO_TARGETS]
+    return targets
+
+
+@dataclass
+class Plan:
+    servings: Dict[str, float]
+    totals: Dict[str, float]
+    kcal: float
+    loss: float
+    seconds: float = 0.0
+    deviation: Dict[str, float] = field(default_factory=dict)  # relative, per target
+
+
+class _Problem:
+    """Scaled least squares over ``columns`` (candidate foods x targets)."""
+
+    def __init__(self, matrix: np.ndarray, targets: List[Target]) -> None:
+        idx = [NUTRIENTS.index(t.nutrient) for t in targets]
+        values = np.array([t.value for t in targets], dtype=float)
+        # Columns of relative contribution per serving: e = B.T @ x - 1
+        self.B = matrix[:, idx] / values
+        self.w = np.array([t.weight for t in targets], dtype=float)
+        self.shortfall_only = np.array([t.kind == "min" for t in targets])
+        self.excess_only = np.array([t.kind == "max" for t in targets])
+        self.norms = np.sqrt((self.B**2 * self.w).sum(axis=1))
+
+    def residual(self, e: np.ndarray) -> np.ndarray:
+        r = e.copy()
+        r[self.shortfall_only] = np.minimum(r[self.shortfall_only], 0.0)
+        r[self.excess_only] = np.maximum(r[self.excess_only], 0.0)
+        return r
+
+    def gradient(self, x: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """d loss / d servings for every candidate, at servings ``x`` on ``rows``."""
+        r = self.residual(self.B[rows].T @ x - 1.0)
+        return self.B @ (2.0 * self.w * r)
+
+    def solve(self, rows: np.ndarray, x0: np.ndarray, cap: Optional[float]) -> np.ndarray:
+        """FISTA over the servings of ``rows`` in column-normalised units."""
+        scale = self.norms[rows]
+        C = self.B[rows] / scale[:, None]
+        Cw = C * np.sqrt(self.w)
+        # 1 / Lipschitz constant of the gradient, 2 * |C W^1/2|^2
+        step = 0.5 / max(np.linalg.eigvalsh(Cw.T @ Cw)[-1], 1e-12)
+        upper = np.inf if cap is None else cap * scale
+        y = x0 * scale
+        z, t = y.copy(), 1.0
+        for _ in range(MAX_ITER):
+            r = self.residual(C.T @ z - 1.0)
+            y_next = np.clip(z - step * (C @ (2.0 * self.w * r)), 0.0, upper)
+            t_next = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+            z = y_next + (t - 1.0) / t_next * (y_next - y)
+            done = np.abs(y_next - y).max(initial=0.0) <= 1e-9 * (1.0 + np.abs(y_next).max(initial=0.0))
+            y, t = y_next, t_next
+            if done:
+                break
+        return y / scale
+
+
+def suggest_servings(
+    foods: FoodTable,
+    names: Optional[Iterable[str]] = None,
+    targets: Optional[List[Target]] = None,
+    max_foods: Optional[int] = 8,
+    max_servings: Optional[float] = None,
+    step: Optional[float] = 0.25,
+) -> Plan:
+    """Servings of ``names`` (default: the whole library) closest to ``targets``.
+
+    ``max_foods`` caps how many foods get a non-zero serving (``None``: no
+    cap, the support grows until no food lowers the loss). ``max_servings``
+    bounds each food and ``step`` rounds the result, e.g. to quarter
+    servings; totals and loss are reported after rounding.
+    """
+    t0 = time.perf_counter()
+    targets = targets or default_targets()
+    if names is None:
+        names = list(foods.index)
+    else:
+        names = [name for name in dict.fromkeys(names) if name in foods]
+    rows = np.fromiter((foods.index[name] for name in names), dtype=np.intp, count=len(names))
+    matrix = foods.matrix[rows]
+    problem = _Problem(matrix, targets)
+    usable = np.flatnonzero(problem.norms > 0)
+
+    limit = len(usable) if max_foods is None else min(max_foods, len(usable))
+    support = np.empty(0, dtype=np.intp)
+    x = np.empty(0)
+    free = np.zeros(len(names), dtype=bool)
+    free[usable] = True
+    while len(support) < limit:
+        # Best food to add: steepest descent per unit of normalised column
+        g = problem.gradient(x, support) / np.where(free, problem.norms, 1.0)
+        g[~free] = np.inf
+        best = int(np.argmin(g))
+        if g[best] >= -1e-9:
+            break
+        free[best] = False
+        support = np.append(support, best)
+        x = problem.solve(support, np.append(x, 0.0), max_servings)
+    keep = x > 0
+    support, x = support[keep], x[keep]
+
+    if step:
+        # Re-solve without the foods that would round away, so the others
+        # make up for them before rounding
+        keep = np.round(x / step) > 0
+        if not keep.all() and keep.any():
+            support = support[keep]
+            x = problem.solve(support, x[keep], max_servings)
+        x = np.round(x / step) * step
+        if max_servings is not None:
+            x = np.minimum(x, max_servings)
+    totals = x @ matrix[support] if len(support) else np.zeros(len(NUTRIENTS))
+    e = np.array([(totals[NUTRIENTS.index(t.nutrient)] - t.value) / t.value for t in targets])
+    return Plan(
+        servings={names[i]: float(q) for i, q in zip(support, x) if q > 0},
+        totals=dict(zip(NUTRIENTS, totals.tolist())),
+        kcal=float(totals @ KCAL_PER_GRAM),
+        loss=float(problem.w @ problem.residual(e) ** 2),
+        seconds=time.perf_counter() - t0,
+        deviation={t.nutrient: float(d) for t, d in zip(targets, problem.residual(e))},
+    )
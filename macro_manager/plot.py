@@ -1,14 +1,15 @@
 import datetime
-import csv
+import io
 from pathlib import Path
-from typing import Dict, Union
-import pandas as pd
-
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING, Dict, Union
 
 from .models import Meal
+from .tracing import traced
+
+if TYPE_CHECKING:  # logstore pulls in pandas; only save_dashboard needs it
+    from .logstore import LogStore
 
-_pale = {
+PALETTE = {
     "orange": "#FFE0B2",
     "green": "#C8E6C9",
     "red": "#FFCDD2",
@@ -20,7 +21,7 @@ _pale = {
 }
 
 
-def _bar_colour(r: float) -> str:
+def bar_colour(r: float) -> str:
     if r >= 1.5:
         return "#D50000"
     if r >= 1.25:
@@ -32,187 +33,199 @@ def _bar_colour(r: float) -> str:
     return "#81C784"
 
 
-def _plot_macros(ax, pct: Dict[str, float], totals: Dict[str, float]) -> None:
-    for lbl, tgt, col, left in [
-        ("Protein", 35, _pale["protein"], 0),
-        ("Fat", 30, _pale["fat"], 35),
-        ("Carbs", 35, _pale["carb"], 65),
-    ]:
-        ax.barh(0, tgt, left=left, height=0.45, color=col, alpha=0.18, edgecolor=col, lw=0.6)
-        ax.text(left + tgt / 2, -0.25, f"Target {tgt}%", ha="center", va="center", fontsize=6, color="white")
-    left = 0
-    for key, lbl, col in [
-        ("protein", "Protein", _pale["protein"]),
-        ("fat", "Fat", _pale["fat"]),
-        ("carb", "Carbs", _pale["carb"]),
-    ]:
+# Static layout shared by every renderer
+MACRO_TARGETS = [  # (label, target %, nutrient, left edge)
+    ("Protein", 35, "protein", 0),
+    ("Fat", 30, "fat", 35),
+    ("Carbs", 35, "carb", 65),
+]
+CAL_HEIGHT, CAL_SCALE, CAL_GOAL = 0.13, 2400, 2000
+CAL_ZONES = [
+    (1600, 1800, PALETTE["orange"]),
+    (1800, 2200, PALETTE["green"]),
+    (2200, 2400, PALETTE["red"]),
+]
+CAL_GUIDES = [1600, 1800, 2000, 2200, 2400]
+BURNED_Y, INTAKE_Y = 0.78, 0.55
+MICRO_Y, MICRO_HEIGHT, MICRO_SLOT = -0.75, 0.24, 23
+MICRO_TARGETS = [  # (label, target, nutrient, unit, gauge full scale)
+    ("Sodium", 2300, "sodium", "mg", 4000),
+    ("Fiber", 28, "fiber", "g", 50),
+    ("Sugar", 50, "add_sugar", "g", 75),
+    ("Potassium", 3400, "potassium", "mg", 5000),
+]
+
+
+def micro_x(i: int) -> float:
+    return i * MICRO_SLOT + (i + 1) * 2
+
+
+def burned_margin(burned_kcal: float, burned_error_kcal: float | None) -> float:
+    if burned_error_kcal is not None:
+        return max(burned_error_kcal, 0.0)
+    return max(burned_kcal * 0.05, 50.0) if burned_kcal else 0.0
+
+
+def macro_labels(pct: Dict[str, float], totals: Dict[str, float]):
+    """Yield ``(label, colour, left, width, text, fontsize)`` per macro bar."""
+    left = 0.0
+    for lbl, _, key, _ in MACRO_TARGETS:
         pc = pct[key]
-        val = totals[key]
-        ax.barh(0, pc, left=left, height=0.30, color=col)
-        extra = (
-            f" ({totals['carb']-totals['fiber']:.0f} net)" if key == "carb" else ""
-        )
-        ax.text(
-            left + pc / 2,
-            0,
-            f"{lbl} {val:.0f} g{extra}",
-            ha="center",
-            va="center",
-            fontsize=8 if pc >= 15 else 6,
-            color="white",
-            weight="bold",
-        )
+        extra = f" ({totals['carb']-totals['fiber']:.0f} net)" if key == "carb" else ""
+        yield lbl, PALETTE[key], left, pc, f"{lbl} {totals[key]:.0f} g{extra}", 8 if pc >= 15 else 6
         left += pc
-    ax.axis('off')
-    ax.set_xlim(0, 100)
-    ax.set_ylim(-1.35, 1)
-
-
-def _plot_calorie_bar(
-    ax,
-    kcal: float,
-    y: float,
-    color: str,
-    label: str,
-    *,
-    show_guides: bool = True,
-    error_margin: float | None = None,
-    goal_kcal: float | None = None,
-) -> None:
-    cal_h, scale = 0.13, 2400
-    ax.barh(y, 100, height=cal_h, color="#888", alpha=0.20, edgecolor="#AAA", lw=0.6)
-    for s, e, c in [
-        (1600, 1800, _pale["orange"]),
-        (1800, 2200, _pale["green"]),
-        (2200, 2400, _pale["red"]),
-    ]:
-        ax.barh(y, (e - s) / scale * 100, left=s / scale * 100, height=cal_h, color=c, alpha=0.15)
-    ax.barh(y, min(kcal / scale, 1) * 100, height=cal_h, left=0, color=color, alpha=0.70)
-    if show_guides:
-        for v in [1600, 1800, 2000, 2200, 2400]:
+
+
+class _CalorieBar:
+    """Artists of one calorie bar; only value, error band and label move."""
+
+    def __init__(self, ax, y: float, color: str, label: str, *, show_guides: bool = True,
+                 goal_kcal: float | None = None) -> None:
+        h = CAL_HEIGHT
+        ax.barh(y, 100, height=h, color="#888", alpha=0.20, edgecolor="#AAA", lw=0.6)
+        for s, e, c in CAL_ZONES:
+            ax.barh(y, (e - s) / CAL_SCALE * 100, left=s / CAL_SCALE * 100, height=h, color=c, alpha=0.15)
+        self.bar = ax.barh(y, 0, height=h, left=0, color=color, alpha=0.70).patches[0]
+        if show_guides:
             ax.vlines(
-                v / scale * 100,
-                y - cal_h / 2,
-                y + cal_h / 2,
+                [v / CAL_SCALE * 100 for v in CAL_GUIDES],
+                y - h / 2,
+                y + h / 2,
                 colors="white",
                 linestyles=(0, (4, 2)),
                 lw=1,
             )
-    if error_margin:
-        lower = max(kcal - error_margin, 0)
-        upper = min(kcal + error_margin, scale)
-        left = lower / scale * 100
-        width = max(upper - lower, 0) / scale * 100
-        ax.barh(
-            y,
-            width,
-            height=cal_h * 0.35,
-            left=left,
-            color="white",
-            alpha=0.95,
-        )
-    if goal_kcal is not None:
-        goal_x = goal_kcal / scale * 100
-        ax.text(
-            goal_x,
-            y - cal_h / 2 - 0.05,
-            f"Goal {goal_kcal:.0f}",
-            ha="center",
-            va="top",
-            fontsize=7,
-            weight="bold",
-            color="#FFC107",
-        )
-    ax.text(
-        min(kcal / scale, 1) * 50,
-        y,
-        f"{kcal:.0f} kcal",
-        ha="center",
-        va="center",
-        fontsize=9,
-        weight="bold",
-        color="white",
-    )
-    ax.text(
-        0,
-        y + cal_h / 2 + 0.03,
-        label,
-        ha="left",
-        va="bottom",
-        fontsize=7,
-        weight="bold",
-        color="white",
-    )
-
-
-def _plot_calories(
-    ax,
-    intake_kcal: float,
-    burned_kcal: float,
-    burned_error_kcal: float | None = None,
-) -> None:
-    burned_y = 0.78
-    intake_y = 0.55
-    burned_value = max(burned_kcal, 0)
-    if burned_error_kcal is not None:
-        burned_margin = max(burned_error_kcal, 0.0)
-    else:
-        burned_margin = max(burned_value * 0.05, 50.0) if burned_value else 0.0
-    _plot_calorie_bar(
-        ax,
-        burned_value,
-        burned_y,
-        _pale["burned"],
-        "Burned",
-        show_guides=False,
-        error_margin=burned_margin if burned_margin else None,
-    )
-    _plot_calorie_bar(
-        ax,
-        max(intake_kcal, 0),
-        intake_y,
-        _pale["calorie"],
-        "Intake",
-        goal_kcal=2000,
-    )
-
-
-def _plot_micros(ax, totals: Dict[str, float]) -> None:
-    row_y, bar_h, slot = -0.75, 0.24, 23
-    for i, (lbl, tgt, val, unit, scale_n) in enumerate([
-        ("Sodium", 2300, totals["sodium"], "mg", 4000),
-        ("Fiber", 28, totals["fiber"], "g", 50),
-        ("Sugar", 50, totals["add_sugar"], "g", 75),
-        ("Potassium", 3400, totals["potassium"], "mg", 5000),
-    ]):
-        x = i * slot + (i + 1) * 2
-        ax.barh(row_y, slot, left=x, height=bar_h, color="white", alpha=0.10, edgecolor="#AAA", lw=0.6)
-        ratio = val / tgt
-        ax.barh(row_y, min(ratio, 1) * slot, left=x, height=bar_h, color=_bar_colour(ratio), alpha=0.90)
-        ax.vlines(x + tgt / scale_n * slot, row_y - bar_h / 2, row_y + bar_h / 2, colors="white", linestyles=(0, (4, 2)), lw=1)
-        ax.text(x + slot / 2, row_y + bar_h / 2 + 0.06, lbl, ha='center', va='bottom', fontsize=7, color='white', weight='bold')
-        ax.text(x + slot / 2, row_y - bar_h / 2 - 0.03, f"{val:.0f}/{tgt}{unit}", ha='center', va='top', fontsize=7, color='white')
+        self.band = ax.barh(y, 0, height=h * 0.35, left=0, color="white", alpha=0.95).patches[0]
+        if goal_kcal is not None:
+            ax.text(goal_kcal / CAL_SCALE * 100, y - h / 2 - 0.05, f"Goal {goal_kcal:.0f}",
+                    ha="center", va="top", fontsize=7, weight="bold", color="#FFC107")
+        self.value = ax.text(0, y, "", ha="center", va="center", fontsize=9, weight="bold", color="white")
+        ax.text(0, y + h / 2 + 0.03, label, ha="left", va="bottom", fontsize=7, weight="bold", color="white")
+
+    def update(self, kcal: float, error_margin: float | None = None) -> None:
+        frac = min(kcal / CAL_SCALE, 1)
+        self.bar.set_width(frac * 100)
+        self.band.set_visible(bool(error_margin))
+        if error_margin:
+            lower = max(kcal - error_margin, 0)
+            upper = min(kcal + error_margin, CAL_SCALE)
+            self.band.set_x(lower / CAL_SCALE * 100)
+            self.band.set_width(max(upper - lower, 0) / CAL_SCALE * 100)
+        self.value.set_x(frac * 50)
+        self.value.set_text(f"{kcal:.0f} kcal")
+
+
+class DashboardRenderer:
+    """Reusable dashboard figure.
+
+    The targets, zones, guides and labels are drawn once in ``__init__``;
+    :meth:`update` only moves the data-dependent bars and texts. The figure is
+    a plain :class:`matplotlib.figure.Figure`, never registered with pyplot,
+    so it is freed with the renderer (or explicitly via :meth:`close`).
+    """
 
+    def __init__(self, figsize=(7, 3)) -> None:
+        from matplotlib.figure import Figure
 
+        self.fig = Figure(figsize=figsize)
+        self.fig.patch.set_alpha(0)
+        ax = self.ax = self.fig.add_subplot()
+        ax.patch.set_alpha(0)
+
+        for lbl, tgt, key, left in MACRO_TARGETS:
+            col = PALETTE[key]
+            ax.barh(0, tgt, left=left, height=0.45, color=col, alpha=0.18, edgecolor=col, lw=0.6)
+            ax.text(left + tgt / 2, -0.25, f"Target {tgt}%", ha="center", va="center", fontsize=6, color="white")
+        self._macro_bars = []
+        self._macro_texts = []
+        for _, _, key, _ in MACRO_TARGETS:
+            self._macro_bars.append(ax.barh(0, 0, left=0, height=0.30, color=PALETTE[key]).patches[0])
+            self._macro_texts.append(
+                ax.text(0, 0, "", ha="center", va="center", color="white", weight="bold")
+            )
+
+        self._burned = _CalorieBar(ax, BURNED_Y, PALETTE["burned"], "Burned", show_guides=False)
+        self._intake = _CalorieBar(ax, INTAKE_Y, PALETTE["calorie"], "Intake", goal_kcal=CAL_GOAL)
+
+        self._micro_bars = []
+        self._micro_texts = []
+        for i, (lbl, tgt, _, _, scale_n) in enumerate(MICRO_TARGETS):
+            x = micro_x(i)
+            ax.barh(MICRO_Y, MICRO_SLOT, left=x, height=MICRO_HEIGHT, color="white", alpha=0.10, edgecolor="#AAA", lw=0.6)
+            self._micro_bars.append(
+                ax.barh(MICRO_Y, 0, left=x, height=MICRO_HEIGHT, alpha=0.90).patches[0]
+            )
+            ax.vlines(x + tgt / scale_n * MICRO_SLOT, MICRO_Y - MICRO_HEIGHT / 2, MICRO_Y + MICRO_HEIGHT / 2, colors="white", linestyles=(0, (4, 2)), lw=1)
+            ax.text(x + MICRO_SLOT / 2, MICRO_Y + MICRO_HEIGHT / 2 + 0.06, lbl, ha='center', va='bottom', fontsize=7, color='white', weight='bold')
+            self._micro_texts.append(
+                ax.text(x + MICRO_SLOT / 2, MICRO_Y - MICRO_HEIGHT / 2 - 0.03, "", ha='center', va='top', fontsize=7, color='white')
+            )
+
+        ax.axis('off')
+        ax.set_xlim(0, 100)
+        ax.set_ylim(-1.35, 1)
+        self.fig.tight_layout(pad=0.25)
+
+    def update(
+        self,
+        totals: Dict[str, float],
+        kcal: float,
+        pct: Dict[str, float],
+        burned_kcal: float,
+        burned_error_kcal: float | None = None,
+    ):
+        for bar, text, (_, _, left, width, label, size) in zip(
+            self._macro_bars, self._macro_texts, macro_labels(pct, totals)
+        ):
+            bar.set_x(left)
+            bar.set_width(width)
+            text.set_position((left + width / 2, 0))
+            text.set_text(label)
+            text.set_fontsize(size)
+
+        burned_value = max(burned_kcal, 0)
+        margin = burned_margin(burned_value, burned_error_kcal)
+        self._burned.update(burned_value, margin or None)
+        self._intake.update(max(kcal, 0))
+
+        for bar, text, (_, tgt, key, unit, _) in zip(self._micro_bars, self._micro_texts, MICRO_TARGETS):
+            val = totals[key]
+            ratio = val / tgt
+            bar.set_width(min(ratio, 1) * MICRO_SLOT)
+            bar.set_facecolor(bar_colour(ratio))
+            text.set_text(f"{val:.0f}/{tgt}{unit}")
+        return self.fig
+
+    @traced()
+    def render(self, meal: Meal, burned_kcal: float, burned_error_kcal: float | None = None):
+        """Update from ``meal``; return ``(fig, totals, kcal)`` like :func:`build_dashboard_figure`."""
+        totals = meal.totals
+        kcal = meal.calories or 1e-6
+        self.update(totals, kcal, meal.macro_pct, burned_kcal, burned_error_kcal)
+        return self.fig, totals, kcal
+
+    @traced()
+    def to_bytes(self, fmt: str = "png", dpi: int = 200) -> bytes:
+        """Encode the current state (same defaults ``st.pyplot`` uses)."""
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight")
+        return buf.getvalue()
+
+    def close(self) -> None:
+        self.fig.clear()
+
+
+@traced()
 def build_dashboard_figure(
     meal: Meal,
     burned_kcal: float,
     burned_error_kcal: float | None = None,
 ):
-    totals = meal.totals
-    kcal = meal.calories or 1e-6
-    pct = {k: (totals[k]*4 if k != 'fat' else totals[k]*9) / kcal * 100 for k in ('protein', 'fat', 'carb')}
-
-    fig, ax = plt.subplots(figsize=(7, 3))
-    fig.patch.set_alpha(0)
-    ax.patch.set_alpha(0)
-    _plot_macros(ax, pct, totals)
-    _plot_calories(ax, kcal, burned_kcal, burned_error_kcal)
-    _plot_micros(ax, totals)
-    plt.tight_layout(pad=0.25)
-    return fig, totals, kcal
+    """One-off render on a fresh figure (see :class:`DashboardRenderer` to reuse one)."""
+    return DashboardRenderer().render(meal, burned_kcal, burned_error_kcal)
 
 
+@traced()
 def save_dashboard(
     meal: Meal,
     burned_kcal: float,
@@ -221,19 +234,30 @@ def save_dashboard(
     workout_error_kcal: float = 0.0,
     weight_kg: float | None = None,
     directory: Union[str, Path] = None,
+    store: "LogStore | None" = None,
+    when: datetime.datetime | None = None,
 ):
+    """Render the dashboard PNG into ``directory`` and upsert the day's log row.
+
+    ``store`` defaults to the CSV log (``macro_log.csv``) in ``directory``;
+    ``when`` (default: now) decides which day is written.
+    """
+    from .logstore import CsvLogStore, format_logged_foods
+
     if directory is None:
         directory = Path(__file__).resolve().parent
     directory = Path(directory)
     directory.mkdir(parents=True, exist_ok=True)
-    fig, totals, kcal = build_dashboard_figure(meal, burned_kcal)
+    renderer = DashboardRenderer()
+    fig, totals, kcal = renderer.render(meal, burned_kcal)
     png_path = directory / "macro_dashboard.png"
     fig.savefig(png_path, dpi=200, transparent=True)
+    renderer.close()
 
-    csv_path = directory / "macro_log.csv"
-    foods_str = "; ".join(f"{f.name}x{q}" for f, q in meal.items)
+    if store is None:
+        store = CsvLogStore(directory / "macro_log.csv")
     row = {
-        "datetime": datetime.datetime.now().isoformat(timespec="seconds"),
+        "datetime": (when or datetime.datetime.now()).isoformat(timespec="seconds"),
         "calories": kcal,
         "burned_calories": burned_kcal,
         "base_burn_calories": base_burn_kcal,
@@ -248,19 +272,10 @@ def save_dashboard(
         "added_sugar_g": totals["add_sugar"],
         "sodium_mg": totals["sodium"],
         "potassium_mg": totals["potassium"],
-        "foods": foods_str,
+        "foods": format_logged_foods(meal.items),
     }
-
-    df_new = pd.DataFrame([row])
-    replaced = False
-    if csv_path.exists() and csv_path.stat().st_size > 0:
-        df = pd.read_csv(csv_path)
-        df["date"] = pd.to_datetime(df["datetime"]).dt.date
-        today = pd.to_datetime(row["datetime"]).date()
-        replaced = today in df["date"].values
-        df = df[df["date"] != today].drop(columns=["date"])
-        df = pd.concat([df, df_new], ignore_index=True)
-    else:
-        df = df_new
-    df.to_csv(csv_path, index=False)
-    return {"png": png_path, "csv": csv_path, "replaced": replaced}
+    replaced = store.upsert(row)
+    paths = {"png": png_path, "log": store.path, "replaced": replaced}
+    if isinstance(store, CsvLogStore):
+        paths["csv"] = store.path
+    return paths
@@ -0,0 +1,127 @@
+"""Write-behind cache that keeps :func:`macro_manager.db.save_profile` off the rerun path."""
+
+import atexit
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .db import load_profile, save_profile
+from .schema import PROFILE_YAML
+
+
+class ProfileStore:
+    """Profiles held in memory and written back once edits go quiet.
+
+    The first :meth:`get` for a path reads the YAML; from then on the
+    in-memory copy is authoritative, so reruns never re-read the file (edits
+    made to it by hand while the app runs are not picked up). :meth:`put`
+    only records the change and pushes the path's write back to ``delay``
+    seconds from now, so scrubbing a number input costs one write at the end.
+    :meth:`flush` writes immediately, e.g. when a session disconnects.
+
+    A failed write is logged and, if it was an OSError, retried after
+    ``delay``; the writer keeps running either way. :meth:`flush` re-raises
+    the last failure that no later write has cleared.
+    """
+
+    def __init__(self, delay: float = 1.0) -> None:
+        self.delay = delay
+        self.writes = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._profiles: dict[Path, dict] = {}
+        self._due: dict[Path, float] = {}  # dirty path -> time.monotonic() to write at
+        self._writing = 0
+        self._error: Exception | None = None
+        self._thread: threading.Thread | None = None
+
+    def get(self, path: Path = PROFILE_YAML) -> dict:
+        path = path.resolve()
+        with self._cond:
+            profile = self._profiles.get(path)
+            if profile is None:
+                profile = self._profiles[path] = load_profile(path)
+            return dict(profile)
+
+    def put(self, profile: dict, path: Path = PROFILE_YAML) -> bool:
+        """Record ``profile`` for ``path``; return False if nothing changed."""
+        path = path.resolve()
+        with self._cond:
+            if self._profiles.get(path) == profile:
+                return False
+            self._profiles[path] = dict(profile)
+            self._due[path] = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="macro-profile", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def dirty(self) -> int:
+        """Profiles whose latest change is not on disk yet."""
+        with self._cond:
+            return len(self._due) + self._writing
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    ready = [path for path, due in self._due.items() if due <= now]
+                    if ready:
+                        break
+                    timeout = min(self._due.values()) - now if self._due else None
+                    self._cond.wait(timeout)
+            for path in ready:
+                try:
+                    self._write(path)
+                except Exception as exc:
+                    # Kept for flush(); an OSError was rescheduled by _write
+                    print(f"macro-manager: could not save the profile {path}: {exc}", file=sys.stderr, flush=True)
+
+    def _write(self, path: Path) -> None:
+        # Serialized, and the latest profile is taken inside the lock, so an
+        # older copy can never land on top of a newer one
+        with self._write_lock:
+            with self._cond:
+                if path not in self._due:
+                    return
+                del self._due[path]
+                profile = dict(self._profiles[path])
+                self._writing += 1
+            try:
+                save_profile(profile, path)
+            except Exception as exc:
+                with self._cond:
+                    self._error = exc
+                    if isinstance(exc, OSError):
+                        self._due.setdefault(path, time.monotonic() + self.delay)
+                        self._cond.notify()
+                raise
+            else:
+                self.writes += 1
+                with self._cond:
+                    self._error = None
+            finally:
+                with self._cond:
+                    self._writing -= 1
+
+    def flush(self, path: Path | None = None) -> None:
+        """Write pending changes now (for ``path`` only, if given).
+
+        Raises the error of a failed write, including one the background
+        writer hit earlier.
+        """
+        with self._cond:
+            paths = list(self._due) if path is None else [path.resolve()]
+        for p in paths:
+            self._write(p)
+        with self._cond:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+
+PROFILE_STORE = ProfileStore()
+atexit.register(PROFILE_STORE.flush)
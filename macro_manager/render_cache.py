@@ -0,0 +1,89 @@
+"""Process-wide LRU cache of rendered dashboard images."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping
+
+
+def dashboard_key(
+    totals: Mapping[str, float],
+    kcal: float,
+    burned_kcal: float,
+    burned_error_kcal: float | None,
+    fmt: str,
+) -> str:
+    """Hash of everything that changes the dashboard image.
+
+    Values are rounded so that float noise from incremental meal updates
+    does not defeat the cache; 1e-4 g/kcal is far below one pixel.
+    """
+    parts = [fmt, *(f"{k}={v:.4f}" for k, v in sorted(totals.items()))]
+    parts += [f"kcal={kcal:.4f}", f"burned={burned_kcal:.4f}"]
+    parts.append("err=none" if burned_error_kcal is None else f"err={burned_error_kcal:.4f}")
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """Bounded LRU of image bytes (PNG) or text (SVG) keyed by :func:`dashboard_key`.
+
+    Entries are evicted least-recently-used first once their combined size
+    exceeds ``max_bytes``; an entry larger than the whole budget is not kept.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes | str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> bytes | str | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key: str, value: bytes | str) -> None:
+        size = len(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def get_or_render(self, key: str, render: Callable[[], bytes | str]) -> bytes | str:
+        value = self.get(key)
+        if value is None:
+            value = render()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+RENDER_CACHE = RenderCache(int(float(os.environ.get("MACRO_MANAGER_RENDER_CACHE_MB", "32")) * 2**20))
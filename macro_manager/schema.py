@@ -0,0 +1,98 @@
+"""Data layout shared by the NumPy code and the dependency-free headless path.
+
+Nothing here may import NumPy, pandas or matplotlib: ``macro-manager
+totals`` relies on this module staying cheap to import.
+"""
+
+import json
+import struct
+from pathlib import Path
+
+# Base directory of the project
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+FOODS_YAML = DATA_DIR / "foods.yaml"
+PROFILE_YAML = DATA_DIR / "profile.yaml"
+
+# Column order of every nutrient vector and of the FoodTable matrix
+NUTRIENTS: tuple[str, ...] = (
+    "protein",
+    "fat",
+    "carb",
+    "fiber",
+    "add_sugar",
+    "sodium",
+    "potassium",
+)
+KCAL_FACTORS: tuple[float, ...] = (4.0, 9.0, 4.0, 0.0, 0.0, 0.0, 0.0)
+
+# Binary snapshot written next to foods.yaml: a fixed header, the
+# foods x nutrients float64 matrix, the NUL-separated UTF-8 names, then the
+# recipe graph as JSON (``{recipe: {ingredient: servings}}``, may be empty).
+# The header ends with the size and mtime_ns of the YAML it was compiled from.
+SNAPSHOT_MAGIC = b"MMFT"
+SNAPSHOT_VERSION = 3
+SNAPSHOT_HEADER = struct.Struct("<4sHHQQQQq")
+
+
+def snapshot_path(path: Path) -> Path:
+    return path.with_name(path.name + ".bin")
+
+
+def journal_path(path: Path) -> Path:
+    return path.with_name(path.name + ".journal")
+
+
+def yaml_stamp(path: Path) -> tuple[int, int]:
+    """``(size, mtime_ns)`` of ``path``, as recorded in its snapshot."""
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def read_snapshot(path: Path) -> bytes | None:
+    """The snapshot bytes of ``path``, or None if there is none or the YAML is gone."""
+    try:
+        return snapshot_path(path).read_bytes()
+    except OSError:
+        return None
+
+
+def parse_snapshot(buf: bytes, stamp: tuple[int, int]) -> tuple[list[str], dict] | None:
+    """Names and recipe graph of a snapshot held in ``buf``.
+
+    None if it is invalid or was not compiled from the YAML whose
+    :func:`yaml_stamp` is ``stamp``. The matrix rows follow the header, at
+    ``SNAPSHOT_HEADER.size``.
+    """
+    if len(buf) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, width, count, names_len, recipes_len, size, mtime_ns = SNAPSHOT_HEADER.unpack_from(buf)
+    matrix_end = SNAPSHOT_HEADER.size + count * width * 8
+    names_end = matrix_end + names_len
+    if (
+        magic != SNAPSHOT_MAGIC
+        or version != SNAPSHOT_VERSION
+        or width != len(NUTRIENTS)
+        or (size, mtime_ns) != tuple(stamp)
+        or len(buf) != names_end + recipes_len
+    ):
+        return None
+    names = bytes(buf[matrix_end:names_end]).decode("utf-8").split("\0") if count else []
+    recipes = json.loads(bytes(buf[names_end:]).decode("utf-8")) if recipes_len else {}
+    return names, recipes
+
+
+def read_journal(path: Path) -> list[dict]:
+    """Entries of the journal for ``path``, in order."""
+    try:
+        lines = journal_path(path).read_bytes().splitlines()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # Torn final append from a crash; everything before it is intact
+            break
+    return entries
@@ -0,0 +1,187 @@
+"""Type-ahead search over food names for large libraries."""
+
+import bisect
+import heapq
+import threading
+import weakref
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Iterable, Mapping
+
+DEFAULT_LIMIT = 50
+# Prefix hits examined per result slot for one- and two-letter queries
+SHORT_QUERY_SCAN = 20
+
+
+def _normalise(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _words(norm: str) -> set[str]:
+    # Library names are often snake_case, so underscores separate words too
+    return set(norm.replace("_", " ").split())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodIndex:
+    """Prefix and trigram index over food names, updated incrementally.
+
+    Prefix lookups bisect two sorted lists (normalised whole names, and
+    ``(word, name)`` pairs so any word can match, with ``_`` splitting words);
+    the trigram postings catch infixes and typos. :meth:`search` ranks exact >
+    whole-name prefix > word prefix > substring, then by trigram similarity.
+    """
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._lock = threading.Lock()
+        self._names: dict[str, str] = {}  # name -> normalised name
+        self._sorted: list[tuple[str, str]] = []  # (normalised, name)
+        self._words: list[tuple[str, str]] = []  # (word, name)
+        self._postings: dict[str, set[str]] = defaultdict(set)
+        self._gram_counts: dict[str, int] = {}
+        for name in names:
+            self._add(name, bulk=True)
+        self._sorted.sort()
+        self._words.sort()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def _add(self, name: str, bulk: bool = False) -> None:
+        if name in self._names:
+            return
+        norm = _normalise(name)
+        self._names[name] = norm
+        insert = list.append if bulk else bisect.insort
+        insert(self._sorted, (norm, name))
+        for word in _words(norm):
+            insert(self._words, (word, name))
+        grams = _trigrams(norm)
+        for gram in grams:
+            self._postings[gram].add(name)
+        self._gram_counts[name] = len(grams)
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            self._add(name)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            norm = self._names.pop(name, None)
+            if norm is None:
+                return
+            self._sorted.pop(bisect.bisect_left(self._sorted, (norm, name)))
+            for word in _words(norm):
+                self._words.pop(bisect.bisect_left(self._words, (word, name)))
+            for gram in _trigrams(norm):
+                posting = self._postings[gram]
+                posting.discard(name)
+                if not posting:
+                    del self._postings[gram]
+            del self._gram_counts[name]
+
+    @staticmethod
+    def _prefixed(entries: list[tuple[str, str]], prefix: str) -> Iterable[str]:
+        i = bisect.bisect_left(entries, (prefix, ""))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        """Up to ``limit`` names best matching ``query`` (alphabetical if empty)."""
+        q = _normalise(query)
+        with self._lock:
+            if not q:
+                return [name for _, name in self._sorted[:limit]]
+            # One or two letters match too much to rank; take the first
+            # alphabetical prefix hits, which is what a type-ahead needs.
+            cap = None if len(q) >= 3 else limit * SHORT_QUERY_SCAN
+            scores: dict[str, float] = {}
+            for name in islice(self._prefixed(self._sorted, q), cap):
+                scores[name] = 3.0 if self._names[name] == q else 2.0
+            for name in islice(self._prefixed(self._words, q), cap):
+                scores.setdefault(name, 1.5)
+            if cap is not None:
+                return self._top(scores, limit)
+            grams = _trigrams(q)
+            need = max(1, len(grams) // 2)
+            postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            # A name sharing >= need of the n grams holds one of any n - need + 1
+            # of them, so candidates only come from the rarest postings.
+            rare = len(grams) - need + 1
+            hits = Counter()
+            for posting in postings[:rare]:
+                hits.update(posting)
+            # A substring match holds every unpadded gram of the query but may
+            # miss the padded edge ones, so it need not be in the rare postings
+            inner = sorted((self._postings.get(q[i : i + 3], set()) for i in range(len(q) - 2)), key=len)
+            for name in set.intersection(*inner) if inner else ():
+                if name not in hits and q in self._names[name]:
+                    hits[name] = 0
+            for name in hits:
+                hits[name] += sum(name in posting for posting in postings[rare:])
+            for name, shared in hits.items():
+                similarity = shared / (len(grams) + self._gram_counts[name] - shared)
+                bonus = scores.get(name)
+                if bonus is None:
+                    bonus = 1.0 if q in self._names[name] else 0.0
+                    # Too little overlap to be a plausible typo of the query
+                    if not bonus and shared < need:
+                        continue
+                scores[name] = bonus + similarity
+        return self._top(scores, limit)
+
+    @staticmethod
+    def _top(scores: dict[str, float], limit: int) -> list[str]:
+        ranked = heapq.nsmallest(limit, ((-score, len(name), name) for name, score in scores.items()))
+        return [name for _, _, name in ranked]
+
+
+# Indexes built by food_index(), keyed by id() of the library they cover
+_INDEXES: dict[int, tuple[weakref.ref, FoodIndex]] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def food_index(foods: Mapping[str, object]) -> FoodIndex:
+    """The shared index for ``foods``, built on first use.
+
+    Callers that add or delete foods should update it with
+    :meth:`FoodIndex.add` / :meth:`FoodIndex.remove`; a library whose size no
+    longer matches its index (changed behind our back) is re-indexed.
+    """
+    with _INDEXES_LOCK:
+        entry = _INDEXES.get(id(foods))
+        if entry is not None and entry[0]() is foods and len(entry[1]) == len(foods):
+            return entry[1]
+        index = FoodIndex(foods)
+        key = id(foods)
+        try:
+            ref = weakref.ref(foods, lambda _: _INDEXES.pop(key, None))
+        except TypeError:  # e.g. a plain dict; nothing to key a cache on
+            return index
+        _INDEXES[key] = (ref, index)
+        return index
+
+
+def carry_index(old: Mapping[str, object], new: Mapping[str, object]) -> FoodIndex:
+    """Hand ``old``'s index over to ``new``, an edited copy of the same library.
+
+    The caller applies the edit with :meth:`FoodIndex.add` /
+    :meth:`FoodIndex.remove`, which saves re-indexing every name.
+    """
+    with _INDEXES_LOCK:
+        entry = _INDEXES.pop(id(old), None)
+    if entry is None or entry[0]() is not old:
+        return food_index(new)
+    index = entry[1]
+    key = id(new)
+    with _INDEXES_LOCK:
+        _INDEXES[key] = (weakref.ref(new, lambda _: _INDEXES.pop(key, None)), index)
+    return index
@@ -0,0 +1,141 @@
+"""Headless meal totals (``macro-manager totals``) without NumPy, pandas or Streamlit.
+
+Foods are looked up straight from the binary snapshot (only the rows the
+meal uses are unpacked) and pending journal entries are applied, with the
+format readers shared with :mod:`macro_manager.db` through
+:mod:`macro_manager.schema`. Without a current snapshot the lookup falls back
+to :func:`macro_manager.db.load_foods`, which does import NumPy but leaves a
+fresh snapshot behind, so the numbers always match the app's.
+"""
+
+import argparse
+import json
+import struct
+import sys
+from pathlib import Path
+from typing import Iterable
+
+import yaml
+
+from .schema import (
+    FOODS_YAML,
+    KCAL_FACTORS,
+    NUTRIENTS,
+    PROFILE_YAML,
+    SNAPSHOT_HEADER,
+    parse_snapshot,
+    read_journal,
+    read_snapshot,
+    yaml_stamp,
+)
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_ROW = struct.Struct(f"<{len(NUTRIENTS)}d")
+
+
+def calculate_bmr(sex: str, weight_kg: float, height_cm: float, age: float) -> float:
+    if not all([sex, weight_kg, height_cm, age]):
+        return 0.0
+    base = 10 * weight_kg + 6.25 * height_cm - 5 * age
+    if sex == "Male":
+        base += 5
+    elif sex == "Female":
+        base -= 161
+    return max(base, 0.0)
+
+
+def _snapshot_rows(path: Path, names: set[str]) -> dict[str, tuple[float, ...]] | None:
+    """Rows for ``names`` from the snapshot, or None if it is missing or stale."""
+    buf = read_snapshot(path)
+    layout = parse_snapshot(buf, yaml_stamp(path)) if buf is not None else None
+    if layout is None:
+        return None
+    return {
+        name: _ROW.unpack_from(buf, SNAPSHOT_HEADER.size + row * _ROW.size)
+        for row, name in enumerate(layout[0])
+        if name in names
+    }
+
+
+def lookup_foods(names: Iterable[str], path: Path = FOODS_YAML) -> dict[str, tuple[float, ...]]:
+    """Nutrient vectors (in :data:`NUTRIENTS` order) of the ``names`` found in the library."""
+    names = set(names)
+    if not path.exists():
+        return {}
+    rows = _snapshot_rows(path, names)
+    if rows is None:
+        # No usable snapshot: let db parse the YAML (re-flattening recipes and
+        # replaying the journal), which also recompiles the snapshot
+        from .db import load_foods
+
+        foods = load_foods(path)
+        return {name: tuple(foods[name].vector.tolist()) for name in names if name in foods}
+    for entry in read_journal(path):
+        if entry["name"] not in names:
+            continue
+        if entry["op"] == "put":
+            # Recipe entries carry their flattened nutrients too
+            rows[entry["name"]] = tuple(float(entry["food"].get(k, 0)) for k in NUTRIENTS)
+        elif entry["op"] == "delete":
+            rows.pop(entry["name"], None)
+    return rows
+
+
+def meal_summary(
+    meal_path: Path,
+    foods_path: Path = FOODS_YAML,
+    burned_kcal: float | None = None,
+    profile_path: Path = PROFILE_YAML,
+) -> dict:
+    """Totals, kcal and net kcal for a meal file (a YAML list of ``{food, servings}``).
+
+    ``burned_kcal`` defaults to the sedentary base burn (BMR x 1.2) of the
+    saved profile, as in the app. Foods missing from the library are listed
+    under ``missing`` and left out of the totals.
+    """
+    entries = yaml.load(Path(meal_path).read_text(), Loader=_Loader) or []
+    servings: dict[str, float] = {}
+    for entry in entries:
+        servings[entry["food"]] = servings.get(entry["food"], 0.0) + float(entry.get("servings", 1))
+    rows = lookup_foods(servings, foods_path)
+
+    totals = dict.fromkeys(NUTRIENTS, 0.0)
+    for name, qty in servings.items():
+        for key, value in zip(NUTRIENTS, rows.get(name, ())):
+            totals[key] += value * qty
+    kcal = sum(totals[k] * f for k, f in zip(NUTRIENTS, KCAL_FACTORS))
+
+    if burned_kcal is None:
+        profile = {}
+        if profile_path.exists():
+            profile = yaml.load(profile_path.read_text(), Loader=_Loader) or {}
+        burned_kcal = calculate_bmr(
+            profile.get("sex", ""),
+            float(profile.get("weight_kg", 0)),
+            float(profile.get("height_cm", 0)),
+            float(profile.get("age", 0)),
+        ) * 1.2
+    return {
+        "totals": totals,
+        "kcal": kcal,
+        "burned_kcal": burned_kcal,
+        "net_kcal": kcal - burned_kcal,
+        "missing": sorted(name for name in servings if name not in rows),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="macro-manager totals",
+        description="Print a meal file's nutrient totals, kcal and net kcal as JSON.",
+    )
+    parser.add_argument("meal", type=Path, help="meal YAML, e.g. data/meal_today.yaml")
+    parser.add_argument("--burned", type=float, default=None,
+                        help="kcal burned (default: base burn from the saved profile)")
+    parser.add_argument("--foods", type=Path, default=FOODS_YAML, help="food library YAML")
+    parser.add_argument("--profile", type=Path, default=PROFILE_YAML)
+    args = parser.parse_args(argv)
+    summary = meal_summary(args.meal, args.foods, args.burned, args.profile)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
@@ -0,0 +1,156 @@
+"""Matplotlib-free SVG rendering of the macro dashboard.
+
+Draws the same layout as :class:`macro_manager.plot.DashboardRenderer`
+(macro split bar, burned/intake calorie bars, micro gauges) straight into an
+SVG string, using the shared layout constants from :mod:`macro_manager.plot`.
+"""
+
+from html import escape
+from typing import Dict
+
+from .models import Meal
+from .plot import (
+    BURNED_Y,
+    CAL_GOAL,
+    CAL_GUIDES,
+    CAL_HEIGHT,
+    CAL_SCALE,
+    CAL_ZONES,
+    INTAKE_Y,
+    MACRO_TARGETS,
+    MICRO_HEIGHT,
+    MICRO_SLOT,
+    MICRO_TARGETS,
+    MICRO_Y,
+    PALETTE,
+    bar_colour,
+    burned_margin,
+    macro_labels,
+    micro_x,
+)
+from .tracing import traced
+
+# Canvas matches the 7x3 in figure at 100 dpi; data limits match the axes
+WIDTH, HEIGHT, PAD = 700, 300, 4
+X_RANGE, Y_RANGE = (0.0, 100.0), (-1.35, 1.0)
+PT = 100 / 72  # one typographic point in pixels
+
+_VALIGN = {"center": "central", "top": "hanging", "bottom": "text-after-edge"}
+_HALIGN = {"center": "middle", "left": "start", "right": "end"}
+
+
+def _x(x: float) -> float:
+    return PAD + (x - X_RANGE[0]) / (X_RANGE[1] - X_RANGE[0]) * (WIDTH - 2 * PAD)
+
+
+def _y(y: float) -> float:
+    return PAD + (Y_RANGE[1] - y) / (Y_RANGE[1] - Y_RANGE[0]) * (HEIGHT - 2 * PAD)
+
+
+class _Canvas:
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+
+    def barh(self, y: float, width: float, *, left: float = 0.0, height: float, color: str,
+             alpha: float = 1.0, edgecolor: str | None = None, lw: float = 0.0) -> None:
+        if width <= 0:
+            return
+        x0, x1 = _x(left), _x(left + width)
+        y0, y1 = _y(y + height / 2), _y(y - height / 2)
+        stroke = (
+            f' stroke="{edgecolor}" stroke-opacity="{alpha}" stroke-width="{lw * PT:.2f}"'
+            if edgecolor and lw
+            else ""
+        )
+        self.parts.append(
+            f'<rect x="{x0:.2f}" y="{y0:.2f}" width="{x1 - x0:.2f}" height="{y1 - y0:.2f}" '
+            f'fill="{color}" fill-opacity="{alpha}"{stroke}/>'
+        )
+
+    def vline(self, x: float, y0: float, y1: float) -> None:
+        self.parts.append(
+            f'<line x1="{_x(x):.2f}" y1="{_y(y0):.2f}" x2="{_x(x):.2f}" y2="{_y(y1):.2f}" '
+            f'stroke="white" stroke-width="{PT:.2f}" stroke-dasharray="{4 * PT:.2f} {2 * PT:.2f}"/>'
+        )
+
+    def text(self, x: float, y: float, s: str, *, ha: str = "center", va: str = "center",
+             fontsize: float = 7, color: str = "white", bold: bool = False) -> None:
+        weight = ' font-weight="bold"' if bold else ""
+        self.parts.append(
+            f'<text x="{_x(x):.2f}" y="{_y(y):.2f}" text-anchor="{_HALIGN[ha]}" '
+            f'dominant-baseline="{_VALIGN[va]}" font-size="{fontsize * PT:.2f}" '
+            f'fill="{color}"{weight}>{escape(s)}</text>'
+        )
+
+    def svg(self) -> str:
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+            f'width="{WIDTH}" height="{HEIGHT}" font-family="DejaVu Sans, Arial, sans-serif">'
+            + "".join(self.parts)
+            + "</svg>"
+        )
+
+
+def _calorie_bar(c: _Canvas, kcal: float, y: float, color: str, label: str, *,
+                 show_guides: bool = True, error_margin: float | None = None,
+                 goal_kcal: float | None = None) -> None:
+    h = CAL_HEIGHT
+    c.barh(y, 100, height=h, color="#888", alpha=0.20, edgecolor="#AAA", lw=0.6)
+    for s, e, col in CAL_ZONES:
+        c.barh(y, (e - s) / CAL_SCALE * 100, left=s / CAL_SCALE * 100, height=h, color=col, alpha=0.15)
+    frac = min(kcal / CAL_SCALE, 1)
+    c.barh(y, frac * 100, height=h, color=color, alpha=0.70)
+    if show_guides:
+        for v in CAL_GUIDES:
+            c.vline(v / CAL_SCALE * 100, y - h / 2, y + h / 2)
+    if error_margin:
+        lower = max(kcal - error_margin, 0)
+        upper = min(kcal + error_margin, CAL_SCALE)
+        c.barh(y, max(upper - lower, 0) / CAL_SCALE * 100, left=lower / CAL_SCALE * 100,
+               height=h * 0.35, color="white", alpha=0.95)
+    if goal_kcal is not None:
+        c.text(goal_kcal / CAL_SCALE * 100, y - h / 2 - 0.05, f"Goal {goal_kcal:.0f}",
+               va="top", fontsize=7, color="#FFC107", bold=True)
+    c.text(frac * 50, y, f"{kcal:.0f} kcal", fontsize=9, bold=True)
+    c.text(0, y + h / 2 + 0.03, label, ha="left", va="bottom", fontsize=7, bold=True)
+
+
+def render_dashboard_svg(
+    totals: Dict[str, float],
+    kcal: float,
+    pct: Dict[str, float],
+    burned_kcal: float,
+    burned_error_kcal: float | None = None,
+) -> str:
+    c = _Canvas()
+    for _, tgt, key, left in MACRO_TARGETS:
+        col = PALETTE[key]
+        c.barh(0, tgt, left=left, height=0.45, color=col, alpha=0.18, edgecolor=col, lw=0.6)
+        c.text(left + tgt / 2, -0.25, f"Target {tgt}%", fontsize=6)
+    for _, col, left, width, label, size in macro_labels(pct, totals):
+        c.barh(0, width, left=left, height=0.30, color=col)
+        c.text(left + width / 2, 0, label, fontsize=size, bold=True)
+
+    burned_value = max(burned_kcal, 0)
+    margin = burned_margin(burned_value, burned_error_kcal)
+    _calorie_bar(c, burned_value, BURNED_Y, PALETTE["burned"], "Burned", show_guides=False,
+                 error_margin=margin or None)
+    _calorie_bar(c, max(kcal, 0), INTAKE_Y, PALETTE["calorie"], "Intake", goal_kcal=CAL_GOAL)
+
+    for i, (lbl, tgt, key, unit, scale_n) in enumerate(MICRO_TARGETS):
+        x = micro_x(i)
+        val = totals[key]
+        ratio = val / tgt
+        c.barh(MICRO_Y, MICRO_SLOT, left=x, height=MICRO_HEIGHT, color="white", alpha=0.10, edgecolor="#AAA", lw=0.6)
+        c.barh(MICRO_Y, min(ratio, 1) * MICRO_SLOT, left=x, height=MICRO_HEIGHT, color=bar_colour(ratio), alpha=0.90)
+        c.vline(x + tgt / scale_n * MICRO_SLOT, MICRO_Y - MICRO_HEIGHT / 2, MICRO_Y + MICRO_HEIGHT / 2)
+        c.text(x + MICRO_SLOT / 2, MICRO_Y + MICRO_HEIGHT / 2 + 0.06, lbl, va="bottom", fontsize=7, bold=True)
+        c.text(x + MICRO_SLOT / 2, MICRO_Y - MICRO_HEIGHT / 2 - 0.03, f"{val:.0f}/{tgt}{unit}", va="top", fontsize=7)
+    return c.svg()
+
+
+@traced()
+def dashboard_svg(meal: Meal, burned_kcal: float = 0.0, burned_error_kcal: float | None = None) -> str:
+    return render_dashboard_svg(
+        meal.totals, meal.calories or 1e-6, meal.macro_pct, burned_kcal, burned_error_kcal
+    )
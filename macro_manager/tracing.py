@@ -0,0 +1,158 @@
+"""Lightweight span timing for app reruns.
+
+Spans are only recorded inside :func:`rerun_trace`, which the app opens when
+``MACRO_MANAGER_TRACE=1`` is set or the page is opened with ``?trace=1``;
+otherwise :func:`span` and :func:`traced` cost one context-variable lookup.
+When ``MACRO_MANAGER_TRACE_FILE`` names a file, every traced rerun is
+appended to it as one JSON line, with tracemalloc allocation deltas per span
+(tracemalloc is process-wide, so concurrent sessions blur those deltas). It
+only runs while such a rerun is in progress.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+TRACE_ENV = "MACRO_MANAGER_TRACE"
+TRACE_FILE_ENV = "MACRO_MANAGER_TRACE_FILE"
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    start_ms: float
+    ms: float = 0.0
+    alloc_kib: float | None = None
+
+
+@dataclass
+class Trace:
+    """Spans recorded during one rerun, in start order."""
+
+    memory: bool = False
+    spans: list[Span] = field(default_factory=list)
+    _t0: float = field(default_factory=time.perf_counter)
+    _depth: int = 0
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        record = Span(name, self._depth, (time.perf_counter() - self._t0) * 1e3)
+        self.spans.append(record)
+        self._depth += 1
+        mem0 = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.ms = (time.perf_counter() - t0) * 1e3
+            if self.memory:
+                record.alloc_kib = (tracemalloc.get_traced_memory()[0] - mem0) / 1024
+            self._depth -= 1
+
+    def to_record(self) -> dict:
+        return {
+            "ts": time.time(),
+            "total_ms": (time.perf_counter() - self._t0) * 1e3,
+            "spans": [asdict(s) for s in self.spans],
+        }
+
+
+_CURRENT: ContextVar[Trace | None] = ContextVar("macro_manager_trace", default=None)
+
+# Reruns currently recording allocations, and whether they started tracemalloc
+_MEMORY_LOCK = threading.Lock()
+_MEMORY_USERS = 0
+_MEMORY_OWNED = False
+
+
+def _start_memory() -> None:
+    global _MEMORY_USERS, _MEMORY_OWNED
+    with _MEMORY_LOCK:
+        if _MEMORY_USERS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _MEMORY_OWNED = True
+        _MEMORY_USERS += 1
+
+
+def _stop_memory() -> None:
+    """Stop tracemalloc after the last traced rerun, unless someone else started it."""
+    global _MEMORY_USERS, _MEMORY_OWNED
+    with _MEMORY_LOCK:
+        _MEMORY_USERS -= 1
+        if _MEMORY_USERS == 0 and _MEMORY_OWNED:
+            tracemalloc.stop()
+            _MEMORY_OWNED = False
+
+
+def trace_enabled(query_flag: str | None = None) -> bool:
+    """True when tracing is switched on by the env var or a ``trace`` query value."""
+    return os.environ.get(TRACE_ENV, "") not in ("", "0") or query_flag in ("1", "true")
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span | None]:
+    """Time the enclosed block as ``name`` if a rerun is being traced."""
+    trace = _CURRENT.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name) as record:
+        yield record
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Decorator form of :func:`span`; defaults to ``module.qualname``."""
+
+    def decorate(fn: F) -> F:
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+@contextmanager
+def rerun_trace(enabled: bool, path: Path | None = None) -> Iterator[Trace | None]:
+    """Collect spans for the enclosed rerun; append them to ``path`` as JSONL.
+
+    ``path`` defaults to ``$MACRO_MANAGER_TRACE_FILE``; when set, tracemalloc
+    runs for the rerun to record allocation deltas (it is left alone if it
+    was already running).
+    """
+    if not enabled:
+        yield None
+        return
+    if path is None and os.environ.get(TRACE_FILE_ENV):
+        path = Path(os.environ[TRACE_FILE_ENV])
+    trace = Trace(memory=path is not None)
+    if trace.memory:
+        _start_memory()
+    token = _CURRENT.set(trace)
+    try:
+        with trace.span("rerun"):
+            yield trace
+    finally:
+        _CURRENT.reset(token)
+        if trace.memory:
+            _stop_memory()
+        if path is not None:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_record()) + "\n")
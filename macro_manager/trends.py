@@ -0,0 +1,75 @@
+"""Shape-preserving downsampling for the Trends tab charts."""
+
+import os
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = int(os.environ.get("MACRO_MANAGER_TREND_POINTS", "500"))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Row indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(area.argmax())
+        keep[i + 1] = prev
+    return keep
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Row indices of the minimum and maximum of ``n_out // 2`` equal buckets."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    buckets = np.array_split(np.arange(n), n_out // 2)
+    picks = [(b[y[b].argmin()], b[y[b].argmax()]) for b in buckets]
+    return np.unique(np.array(picks).ravel())
+
+
+def downsample_frame(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    max_points: int = DEFAULT_MAX_POINTS,
+    method: str = "lttb",
+) -> pd.DataFrame:
+    """Reduce ``df`` (indexed by time) to about ``max_points`` rows.
+
+    Each column gets an equal share of the budget and the union of the rows
+    picked for every column is returned, so all series can share a single
+    chart payload whose size does not grow with the history.
+    """
+    if len(df) <= max_points or not columns:
+        return df
+    share = max(max_points // len(columns), 3)
+    x = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else np.arange(len(df))
+    rows = set()
+    for column in columns:
+        y = df[column].to_numpy(dtype=float)
+        if method == "minmax":
+            rows.update(minmax_indices(y, share).tolist())
+        else:
+            rows.update(lttb_indices(x, y, share).tolist())
+    return df.iloc[sorted(rows)]
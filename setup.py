@@ -11,6 +11,7 @@ setup(
         "streamlit>=1.45",
         "pyyaml>=6.0",
         "matplotlib>=3.10",
+        "numpy>=1.26",
     ],
     entry_points={
         "console_scripts": [
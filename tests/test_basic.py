@@ -1,11 +1,24 @@
+import os
 import sys
+from dataclasses import asdict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from macro_manager.models import Food, Meal
-from macro_manager.db import load_foods
-from pytest import approx
+from macro_manager.models import Food, FoodTable, Meal
+from macro_manager import db
+from macro_manager.db import (
+    delete_foods,
+    foods_cache_stats,
+    invalidate_foods_cache,
+    journal_path,
+    load_foods,
+    put_food,
+    read_food_snapshot,
+    save_foods,
+    snapshot_path,
+)
+from pytest import approx, raises, warns
 
 
 def test_food_loading(tmp_path):
@@ -26,3 +39,170 @@ def test_meal_totals():
     assert totals["fat"] == 10
     assert totals["carb"] == 1.2
     assert meal.calories == approx(12*4 + 10*9 + 1.2*4, rel=1e-3)
+
+
+def test_food_table_views():
+    table = FoodTable([Food("egg", 6, 5, 0.6), Food("apple", 0.3, 0.2, 10)])
+    egg = table["egg"]
+    assert isinstance(egg, Food)
+    assert table.matrix.shape == (2, 7)
+    table["egg"] = Food("egg", 7, 5, 0.6)
+    assert egg.protein == 7
+    del table["apple"]
+    assert "apple" not in table and len(table) == 1
+
+
+def test_meal_table_mode_matches_item_mode():
+    table = FoodTable([Food("egg", 6, 5, 0.6), Food("apple", 0.3, 0.2, 10)])
+    vec_meal = Meal(table=table)
+    list_meal = Meal()
+    for name, qty in [("egg", 2), ("apple", 1.5)]:
+        vec_meal.add(table[name], qty)
+        list_meal.add(Food(**asdict(table[name])), qty)
+    table["banana"] = Food("banana", 1, 0, 27)
+    vec_meal.add(table["banana"], 1)
+    list_meal.add(Food("banana", 1, 0, 27), 1)
+    for key, value in list_meal.totals.items():
+        assert vec_meal.totals[key] == approx(value)
+    assert vec_meal.calories == approx(list_meal.calories)
+
+
+def test_meal_incremental_updates():
+    egg = Food("egg", 6, 5, 0.6)
+    apple = Food("apple", 0.3, 0.2, 10)
+    meal = Meal()
+    meal.add(egg, 2)
+    meal.add(apple, 1)
+    meal.set_servings(egg, 3)
+    assert meal.totals["protein"] == approx(18.3)
+    assert meal.quantities == {"egg": 3, "apple": 1}
+    meal.remove("apple")
+    assert meal.totals["carb"] == approx(1.8)
+    assert meal.macro_pct["fat"] == approx(15 * 9 / meal.calories * 100)
+    meal.set_servings(egg, 0)
+    assert meal.items == [] and meal.calories == 0
+
+
+def test_food_cache_hits_and_invalidation(tmp_path):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\n""")
+    before = foods_cache_stats()
+    first = load_foods(sample)
+    assert load_foods(sample) is first
+    after = foods_cache_stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+    edited = first.copy()
+    edited["apple"] = Food("apple", 0.3, 0.2, 10)
+    save_foods(edited, sample)
+    reloaded = load_foods(sample)
+    assert reloaded is not first
+    assert set(reloaded) == {"apple", "banana"}
+
+
+def test_binary_snapshot_round_trip(tmp_path):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\nbänana split:\n  fat: 12\n""")
+    load_foods(sample)
+    assert snapshot_path(sample).exists()
+    invalidate_foods_cache(sample)
+    foods = load_foods(sample)
+    assert not foods.matrix.flags.writeable
+    assert foods["bänana split"].fat == 12
+    with raises(TypeError):
+        foods["banana"] = Food("banana", 2, 0, 27)  # shared by every session
+    foods = foods.copy()
+    foods["banana"] = Food("banana", 2, 0, 27)
+    assert foods["banana"].protein == 2
+
+    stat = sample.stat()
+    os.utime(sample, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_food_snapshot(sample) is None
+    # Same mtime, different size (e.g. an edit within the clock's resolution)
+    load_foods(sample)
+    stat = sample.stat()
+    sample.write_text(sample.read_text() + "apple:\n  carb: 10\n")
+    os.utime(sample, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert read_food_snapshot(sample) is None
+
+
+def test_journal_replay_and_compaction(tmp_path, monkeypatch):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\n""")
+    original = load_foods(sample)
+    foods = put_food(original, Food("apple", 0.3, 0.2, 10), sample)
+    foods = delete_foods(foods, ["banana"], sample)
+    assert set(original) == {"banana"}  # edits never touch a loaded table
+    assert journal_path(sample).exists()
+    assert "banana" in sample.read_text()
+    assert load_foods(sample) is foods
+
+    invalidate_foods_cache(sample)
+    replayed = load_foods(sample)
+    assert set(replayed) == {"apple"}
+
+    monkeypatch.setattr(db, "JOURNAL_COMPACT_THRESHOLD", 1)
+    put_food(replayed, Food("egg", 6, 5, 0.6), sample)
+    assert not journal_path(sample).exists()
+    invalidate_foods_cache(sample)
+    assert set(load_foods(sample)) == {"apple", "egg"}
+
+
+def test_meal_recomputes_after_table_edit():
+    table = FoodTable([Food("egg", 6, 5, 0.6)])
+    meal = Meal(table=table)
+    meal.add(table["egg"], 2)
+    table["egg"] = Food("egg", 7, 5, 0.6)
+    assert meal.stale
+    meal.recompute()
+    assert meal.totals["protein"] == 14 and not meal.stale
+
+
+def test_failed_journal_write_publishes_nothing(tmp_path, monkeypatch):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\n""")
+    foods = load_foods(sample)
+
+    def fail(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(db.os, "fsync", fail)
+    with raises(OSError):
+        put_food(foods, Food("apple", 0.3, 0.2, 10), sample)
+    monkeypatch.undo()
+    assert "apple" not in load_foods(sample)
+    assert journal_path(sample).read_bytes() == b""
+    put_food(foods, Food("egg", 6, 5, 0.6), sample)
+    invalidate_foods_cache(sample)
+    assert set(load_foods(sample)) == {"banana", "egg"}
+
+
+def test_failed_compaction_keeps_the_edit(tmp_path, monkeypatch):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\n""")
+    foods = load_foods(sample)
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(db, "JOURNAL_COMPACT_THRESHOLD", 1)
+    monkeypatch.setattr(db, "atomic_write", fail)
+    with warns(UserWarning, match="could not compact"):
+        edited = put_food(foods, Food("apple", 0.3, 0.2, 10), sample)
+    monkeypatch.undo()
+    assert "apple" in edited
+    invalidate_foods_cache(sample)
+    assert set(load_foods(sample)) == {"banana", "apple"}
+
+
+def test_snapshot_write_failure_warns(tmp_path, monkeypatch):
+    sample = tmp_path / "foods.yaml"
+    sample.write_text("""banana:\n  protein: 1\n  carb: 27\n""")
+
+    def fail(*args):
+        raise OSError("read-only directory")
+
+    monkeypatch.setattr(db, "write_food_snapshot", fail)
+    with warns(UserWarning, match="food snapshot"):
+        foods = load_foods(sample)
+    assert foods["banana"].carb == 27
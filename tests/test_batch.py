@@ -0,0 +1,41 @@
+import matplotlib
+matplotlib.use('Agg')
+
+from macro_manager.batch import rehydrate_meal, rerender_days
+from macro_manager.db import save_foods
+from macro_manager.logstore import SqliteLogStore
+from macro_manager.models import Food
+
+
+def make_row(day, foods, burned=2000.0):
+    return {"datetime": f"{day}T20:00:00", "calories": 0, "burned_calories": burned, "foods": foods}
+
+
+def test_rehydrate_meal_reports_missing_foods():
+    foods = {'egg': Food('egg', 6, 5, 0.6)}
+    meal, missing = rehydrate_meal('eggx2.0; unicornx1.0', foods)
+    assert meal.quantities == {'egg': 2.0}
+    assert missing == ['unicorn']
+
+
+def test_rerender_days_writes_one_image_per_day(tmp_path):
+    foods_path = tmp_path / 'foods.yaml'
+    save_foods({'egg': Food('egg', 6, 5, 0.6)}, foods_path)
+    store = SqliteLogStore(tmp_path / 'log.sqlite')
+    store.upsert_many([
+        make_row('2024-01-01', 'eggx2.0'),
+        make_row('2024-01-02', None, burned=None),
+        make_row('2024-01-03', 'eggx1.0; gonex1.0'),
+    ])
+    out = tmp_path / 'out'
+    report = rerender_days(store, out, start='2024-01-02', workers=2, foods_path=foods_path)
+    assert report['days'] == 2
+    assert report['missing'] == {'2024-01-03': ['gone']}
+    assert sorted(p.name for p in out.iterdir()) == [
+        'macro_dashboard_2024-01-02.png',
+        'macro_dashboard_2024-01-03.png',
+    ]
+
+    report = rerender_days(store, out, workers=1, fmt='svg', foods_path=foods_path)
+    assert report['days'] == 3
+    assert (out / 'macro_dashboard_2024-01-01.svg').read_text().startswith('<svg')
@@ -0,0 +1,24 @@
+import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+
+from macro_manager.export import ExportWorker
+from macro_manager.logstore import CsvLogStore
+from macro_manager.models import Food, Meal
+
+
+def test_export_worker_snapshots_meal_and_flushes(tmp_path):
+    meal = Meal()
+    meal.add(Food('egg', 6, 5, 0.6), 2)
+    store = CsvLogStore(tmp_path / 'log.csv')
+    worker = ExportWorker()
+    when = datetime.datetime(2024, 3, 1, 23, 59, 59)
+    job = worker.submit(meal, burned_kcal=2000, base_burn_kcal=2000, workout_adjust_kcal=0,
+                        directory=tmp_path, store=store, when=when)
+    meal.add(Food('apple', 0.3, 0.2, 10), 1)  # must not leak into the queued save
+    assert worker.flush(timeout=30)
+    assert worker.pending() == 0
+    paths = job.result()
+    assert paths['png'].exists()
+    assert store.get(when.date())['foods'] == 'eggx2.0'
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+from macro_manager import importer
+from macro_manager.db import invalidate_foods_cache, load_foods, save_foods
+from macro_manager.importer import import_foods, iter_csv, iter_json
+from macro_manager.models import Food
+
+
+def test_csv_import_merges_in_batches_and_saves_once(tmp_path, monkeypatch):
+    foods_path = tmp_path / 'foods.yaml'
+    save_foods({'egg': Food('egg', 6, 5, 0.6)}, foods_path)
+    csv_text = (
+        'NDB_No,Shrt_Desc,Protein_(g),Lipid_Tot_(g),Carbohydrt_(g),Fiber_TD_(g),Sodium_(mg),Potassium_(mg)\n'
+        '1,OATS,16.9,6.9,66.3,10.6,2,429\n'
+        '2,egg,12.6,9.5,0.7,,142,138\n'
+        '3,,1,1,1,1,1,1\n'
+        '4,LENTILS,9,0.4,20,7.9,2,369\n'
+    )
+    saves = []
+    monkeypatch.setattr(importer, 'save_foods', lambda foods, path: saves.append(path) or save_foods(foods, path))
+    batches = []
+    stats = import_foods(iter_csv(io.StringIO(csv_text)), load_foods(foods_path), foods_path,
+                         batch_size=2, progress=lambda s: batches.append(s.imported))
+
+    assert (stats.rows, stats.imported, stats.skipped) == (4, 3, 1)
+    assert batches == [2, 3]
+    assert saves == [foods_path]
+    invalidate_foods_cache()
+    foods = load_foods(foods_path)
+    assert foods['OATS'] == Food('OATS', 16.9, 6.9, 66.3, 10.6, 0, 2, 429)
+    assert foods['egg'].protein == 12.6 and foods['egg'].fiber == 0
+
+
+def test_skip_existing_keeps_library_food(tmp_path):
+    foods_path = tmp_path / 'foods.yaml'
+    save_foods({'egg': Food('egg', 6, 5, 0.6)}, foods_path)
+    rows = iter_csv(io.StringIO('name,protein\negg,99\n'))
+    stats = import_foods(rows, load_foods(foods_path), foods_path, replace=False)
+    assert stats.skipped == 1 and load_foods(foods_path)['egg'].protein == 6
+
+    rows = iter_csv(io.StringIO('name,protein\noats,17\noats,99\n'))
+    stats = import_foods(rows, load_foods(foods_path), foods_path, replace=False)
+    assert (stats.imported, stats.skipped) == (1, 1)
+    assert load_foods(foods_path)['oats'].protein == 17
+
+
+def test_fdc_json_is_streamed_across_chunks(monkeypatch):
+    monkeypatch.setattr(importer, '_CHUNK', 7)
+    food = {
+        'description': 'Hummus',
+        'foodNutrients': [
+            {'nutrient': {'number': '203', 'name': 'Protein'}, 'amount': 7.4},
+            {'nutrient': {'number': '307', 'name': 'Sodium, Na'}, 'amount': 379},
+            {'nutrient': {'number': '999'}, 'amount': 1},
+        ],
+    }
+    payload = json.dumps({'FoundationFoods': [food, {**food, 'description': 'Tahini'}]}, indent=1)
+    rows = list(iter_json(io.StringIO(payload)))
+    assert [name for name, _ in rows] == ['Hummus', 'Tahini']
+    assert rows[0][1] == [7.4, 0, 0, 0, 0, 379, 0]
+    lines = '\n'.join(json.dumps(food) for _ in range(3))
+    assert len(list(iter_json(io.StringIO(lines), lines=True))) == 3
+
+
+def test_unknown_mapped_column_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_csv(io.StringIO('a,b\n1,2\n'), {'name': 'food'}))
+
+
+def test_saved_yaml_round_trips_awkward_names(tmp_path):
+    import yaml
+
+    names = ['Rice Cake', 'yes', 'null', '1up', 'a: b', 'x #y', "O'Brien", 'Café', 'line break', '-dash', 'tab\t']
+    foods = {n: Food(n, 1.5, 7e-05, 0, sodium=1e20) for n in names}
+    path = tmp_path / 'foods.yaml'
+    save_foods(foods, path)
+    loaded = yaml.safe_load(path.read_text())
+    assert set(loaded) == set(names)
+    assert loaded['yes'] == {'protein': 1.5, 'fat': 7e-05, 'sodium': 1e20}
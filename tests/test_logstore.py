@@ -0,0 +1,207 @@
+import datetime
+from pathlib import Path
+
+import pytest
+
+from macro_manager import archive, logstore
+from macro_manager.archive import ArchiveLogStore
+from macro_manager.logstore import (
+    ROLLUP_KINDS,
+    CsvLogStore,
+    LogStore,
+    SqliteLogStore,
+    open_log_store,
+    parse_logged_foods,
+)
+
+
+def make_row(day: str, calories: float, foods: str = "eggx2.0") -> dict:
+    return {
+        "datetime": f"{day}T12:00:00",
+        "calories": calories,
+        "net_calories": calories - 2000,
+        "protein_g": calories / 20,
+        "foods": foods,
+    }
+
+
+@pytest.mark.parametrize(
+    "store_cls, name",
+    [(SqliteLogStore, "log.sqlite"), (CsvLogStore, "log.csv"), (ArchiveLogStore, "log.archive")],
+)
+def test_upsert_replaces_same_day(tmp_path, store_cls, name):
+    store = store_cls(tmp_path / name)
+    assert store.upsert(make_row("2024-01-01", 1800)) is False
+    assert store.upsert(make_row("2024-01-02", 1900)) is False
+    assert store.upsert(make_row("2024-01-01", 2100)) is True
+    assert store.dates() == [datetime.date(2024, 1, 2), datetime.date(2024, 1, 1)]
+    assert store.get("2024-01-01")["calories"] == 2100
+    assert store.get(datetime.date(2023, 12, 31)) is None
+
+    df = store.range("2024-01-02", None, columns=["calories", "burned_calories"])
+    assert list(df.columns) == ["datetime", "calories", "burned_calories"]
+    assert df["calories"].tolist() == [1900]
+
+
+def test_sqlite_migrates_existing_csv(tmp_path):
+    csv_store = CsvLogStore(tmp_path / "macro_log.csv")
+    csv_store.upsert(make_row("2024-01-01", 1800))
+    csv_store.upsert(make_row("2024-01-03", 2000))
+    store = open_log_store(tmp_path, backend="sqlite")
+    assert isinstance(store, SqliteLogStore)
+    assert len(store.dates()) == 2
+    assert parse_logged_foods(store.get("2024-01-03")["foods"]) == {"egg": 2.0}
+    assert open_log_store(tmp_path, backend="sqlite") is store
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "archive"])
+def test_migration_skips_rows_without_a_date(tmp_path, backend):
+    (tmp_path / "macro_log.csv").write_text(
+        "datetime,calories,foods\n2024-01-01T12:00:00,1800,eggx1.0\n,1900,\nNone,2000,\n"
+    )
+    with pytest.warns(UserWarning, match="skipped 2 row"):
+        store = open_log_store(tmp_path, backend=backend)
+    assert store.dates() == [datetime.date(2024, 1, 1)]
+
+
+def test_failed_migration_is_retried(tmp_path, monkeypatch):
+    CsvLogStore(tmp_path / "macro_log.csv").upsert(make_row("2024-01-01", 1800))
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logstore, "migrate_csv_to_sqlite", fail)
+    with pytest.raises(OSError):
+        open_log_store(tmp_path, backend="sqlite")
+    assert (tmp_path / "macro_log.sqlite").exists()
+    monkeypatch.undo()
+    assert len(open_log_store(tmp_path, backend="sqlite").dates()) == 1
+    assert not (tmp_path / "macro_log.sqlite.migrating").exists()
+
+
+def test_archive_prunes_partitions(tmp_path):
+    store = ArchiveLogStore(tmp_path / "log.archive")
+    store.upsert_many([make_row("2022-12-31", 1700), make_row("2023-06-01", 1800)])
+    store.upsert(make_row("2024-02-29", 1900, foods=None))
+    assert store.years() == [2022, 2023, 2024]
+    # An unreadable 2022 partition proves it is never opened for a 2023+ query
+    (tmp_path / "log.archive" / "2022" / "calories.npy").write_bytes(b"garbage")
+    df = store.range("2023-01-01", "2024-12-31", columns=["calories"])
+    assert df["calories"].tolist() == [1800, 1900]
+    assert store.get("2024-02-29")["foods"] is None
+
+
+def test_archive_recovers_from_interrupted_swap(tmp_path, monkeypatch):
+    store = ArchiveLogStore(tmp_path / "log.archive")
+    store.upsert(make_row("2024-01-01", 1800))
+    replace = archive.os.replace
+
+    def crash(src, dst):
+        if Path(src).name.endswith(".new"):
+            raise OSError("power cut")
+        replace(src, dst)
+
+    monkeypatch.setattr(archive.os, "replace", crash)
+    with pytest.raises(OSError):
+        store.upsert(make_row("2024-01-02", 1900))
+    monkeypatch.undo()
+    assert not (tmp_path / "log.archive" / "2024").exists()  # only 2024.old is left
+
+    assert store.years() == [2024]
+    assert store.get("2024-01-01")["calories"] == 1800
+    assert sorted(p.name for p in (tmp_path / "log.archive").iterdir()) == ["2024"]
+    assert store.upsert(make_row("2024-01-02", 1900)) is False
+    assert len(store.dates()) == 2
+
+
+@pytest.mark.parametrize("kind", ROLLUP_KINDS)
+def test_materialized_rollups_match_recomputation(tmp_path, kind):
+    store = SqliteLogStore(tmp_path / "log.sqlite")
+    days = [datetime.date(2024, 1, 1) + datetime.timedelta(days=i) for i in range(0, 75, 2)]
+    for i, day in enumerate(days):
+        store.upsert(make_row(day.isoformat(), 1500 + 10 * i))
+    store.upsert(make_row("2024-01-15", 3000))  # replace inside existing windows
+
+    want = LogStore.rollups(store, kind, "2024-02-01")  # computed from raw rows
+    got = store.rollups(kind, "2024-02-01")
+    assert got["period"].tolist() == want["period"].tolist()
+    assert got["n"].tolist() == want["n"].tolist()
+    assert got["calories"].tolist() == pytest.approx(want["calories"].tolist())
+
+
+def test_rollups_rebuilt_for_new_metrics(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "log.sqlite"
+    SqliteLogStore(path).upsert({**make_row("2024-01-01", 1800), "burned_calories": 2200})
+    with sqlite3.connect(path) as conn:  # a rollup table from before burned_calories
+        conn.execute("DROP TABLE rollup")
+        conn.execute("CREATE TABLE rollup (kind TEXT, period TEXT, n INTEGER, calories REAL)")
+    rollups = SqliteLogStore(path).rollups("weekly")
+    assert rollups["burned_calories"].tolist() == [2200]
+    assert rollups["calories"].tolist() == [1800]
+
+
+def test_csv_date_index_serves_reads_without_parsing(tmp_path, monkeypatch):
+    import pandas as pd
+
+    from macro_manager import logstore
+
+    store = CsvLogStore(tmp_path / "macro_log.csv")
+    for day, kcal in [("2024-01-01", 1800), ("2024-01-02", 1900), ("2024-01-03", 2000)]:
+        store.upsert(make_row(day, kcal))
+    assert store.upsert(make_row("2024-01-03", 2050)) is True  # last row
+    assert store.upsert(make_row("2024-01-01", 1850, foods='tea, "green"x1.0')) is True  # spliced
+    assert store.index_path.exists()
+
+    def no_pandas(*args, **kwargs):
+        raise AssertionError("read_csv called")
+
+    monkeypatch.setattr(logstore.pd, "read_csv", no_pandas)
+    logstore._CSV_INDEXES.clear()
+    fresh = CsvLogStore(store.path)
+    assert fresh.dates() == [datetime.date(2024, 1, 3), datetime.date(2024, 1, 2), datetime.date(2024, 1, 1)]
+    assert fresh.get("2024-01-03")["calories"] == 2050
+    assert fresh.get("2024-01-01")["foods"] == 'tea, "green"x1.0'
+    monkeypatch.undo()
+
+    df = pd.read_csv(store.path)
+    assert df["calories"].tolist() == [1900, 2050, 1850]
+
+
+def test_csv_date_index_rebuilds_after_outside_edits(tmp_path):
+    from macro_manager import logstore
+
+    store = CsvLogStore(tmp_path / "macro_log.csv")
+    store.upsert(make_row("2024-01-01", 1800))
+    with store.path.open("a", newline="") as f:
+        f.write('2024-01-05T08:00:00,1500,-500,75.0,"multi\nline"x1.0\n')
+    logstore._CSV_INDEXES.clear()
+    assert store.dates()[0] == datetime.date(2024, 1, 5)
+    assert store.get("2024-01-05")["foods"] == "multi\nline" + "x1.0"
+    assert store.upsert(make_row("2024-01-02", 1700)) is False
+    assert [d.day for d in store.dates()] == [5, 2, 1]
+
+    # A row with columns the file lacks falls back to a full rewrite
+    assert store.upsert({**make_row("2024-01-02", 1750), "weight_kg": 70.0}) is True
+    assert store.get("2024-01-02")["weight_kg"] == 70.0
+    assert store.get("2024-01-05")["calories"] == 1500
+
+
+def test_csv_date_index_survives_failed_write(tmp_path, monkeypatch):
+    store = CsvLogStore(tmp_path / "macro_log.csv")
+    store.upsert(make_row("2024-01-01", 1800))
+    store.upsert(make_row("2024-01-02", 1900))
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logstore.os, "replace", fail)
+    with pytest.raises(OSError):
+        store.upsert(make_row("2024-01-01", 1850))  # splice
+    with pytest.raises(OSError):
+        store.upsert(make_row("2024-01-02", 1950))  # re-save of the last row
+    monkeypatch.undo()
+    assert [d.day for d in store.dates()] == [2, 1]
+    assert store.get("2024-01-01")["calories"] == 1800
+    assert store.get("2024-01-02")["calories"] == 1900
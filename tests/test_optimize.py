@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from macro_manager.models import Food, FoodTable
+from macro_manager.optimize import Target, default_targets, suggest_servings
+
+
+def test_default_targets_follow_the_dashboard():
+    targets = {t.nutrient: t for t in default_targets()}
+    assert targets['protein'].value == pytest.approx(2000 * 0.35 / 4)
+    assert targets['fat'].value == pytest.approx(2000 * 0.30 / 9)
+    assert (targets['sodium'].kind, targets['fiber'].kind) == ('max', 'min')
+
+
+def test_subset_hits_reachable_targets():
+    foods = FoodTable([
+        Food('whey', 30, 0, 0),
+        Food('oil', 0, 14, 0),
+        Food('rice', 0, 0, 45),
+        Food('salt', 0, 0, 0, sodium=2300),
+    ])
+    plan = suggest_servings(foods, ['whey', 'oil', 'rice', 'salt'], step=None)
+    assert plan.kcal == pytest.approx(2000, rel=1e-3)
+    assert plan.totals['protein'] == pytest.approx(175, rel=1e-3)
+    assert plan.servings.get('salt', 0) == 0  # sodium is a limit, not a goal
+    assert plan.deviation['sodium'] == 0
+
+    capped = suggest_servings(foods, ['whey', 'oil', 'rice'], max_servings=2)
+    assert max(capped.servings.values()) <= 2
+    assert all(q % 0.25 == 0 for q in capped.servings.values())
+
+
+def test_whole_library_search_is_sparse():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.random((12_000, 7)) * [40, 30, 80, 15, 30, 1200, 900], 1)
+    foods = FoodTable(Food(f'food-{i}', *row) for i, row in enumerate(values.tolist()))
+    plan = suggest_servings(foods, max_foods=6)
+    assert 0 < len(plan.servings) <= 6
+    assert plan.kcal == pytest.approx(2000, rel=0.05)
+    assert plan.loss < 0.05
+
+
+def test_uncapped_support_still_rounds_to_a_plan():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.random((2000, 7)) * [40, 30, 80, 15, 30, 1200, 900], 1)
+    foods = FoodTable(Food(f'food-{i}', *row) for i, row in enumerate(values.tolist()))
+    plan = suggest_servings(foods, max_foods=None, step=0.25)
+    assert plan.servings
+    assert all(q % 0.25 == 0 for q in plan.servings.values())
+    assert plan.loss < 0.05
+
+
+def test_custom_targets():
+    foods = FoodTable([Food('egg', 6, 5, 0.6)])
+    plan = suggest_servings(foods, targets=[Target('protein', 30)], step=None)
+    assert plan.servings == {'egg': pytest.approx(5)}
@@ -1,8 +1,10 @@
+import io
+
 import matplotlib
 matplotlib.use('Agg')
 
 from macro_manager.models import Food, Meal
-from macro_manager.plot import build_dashboard_figure, save_dashboard
+from macro_manager.plot import DashboardRenderer, build_dashboard_figure, save_dashboard
 from pytest import approx
 
 def sample_meal():
@@ -13,7 +15,7 @@ def sample_meal():
 
 def test_build_dashboard_figure():
     meal = sample_meal()
-    fig, totals, kcal = build_dashboard_figure(meal)
+    fig, totals, kcal = build_dashboard_figure(meal, 2000)
     assert fig is not None
     assert totals['carb'] == approx(meal.totals['carb'])
     assert kcal == approx(meal.calories)
@@ -21,6 +23,23 @@ def test_build_dashboard_figure():
 
 def test_save_dashboard(tmp_path):
     meal = sample_meal()
-    paths = save_dashboard(meal, tmp_path)
+    paths = save_dashboard(meal, 2000, 1800, 200, directory=tmp_path)
     assert paths['png'].exists()
     assert paths['csv'].exists()
+
+
+def _pixels(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='rgba')
+    return buf.getvalue()
+
+
+def test_renderer_reuse_matches_fresh_render():
+    renderer = DashboardRenderer()
+    renderer.render(sample_meal(), 2500, 300)
+    meal = Meal()
+    meal.add(Food('banana', 1, 0, 27, fiber=3, add_sugar=14, sodium=1, potassium=422), 3)
+    reused, _, _ = renderer.render(meal, 1200)
+    fresh, _, _ = build_dashboard_figure(meal, 1200)
+    assert _pixels(reused) == _pixels(fresh)
+    renderer.close()
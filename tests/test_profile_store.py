@@ -0,0 +1,86 @@
+import time
+
+import pytest
+import yaml
+
+from macro_manager import profile_store
+from macro_manager.profile_store import ProfileStore
+
+
+def test_rapid_changes_coalesce_into_one_write(tmp_path, monkeypatch):
+    path = tmp_path / 'profile.yaml'
+    path.write_text('age: 30\n')
+    reads = []
+    monkeypatch.setattr(profile_store, 'load_profile', lambda p: reads.append(p) or yaml.safe_load(p.read_text()))
+    store = ProfileStore(delay=0.2)
+
+    assert store.get(path) == {'age': 30}
+    assert not store.put({'age': 30}, path)
+    for age in range(31, 41):
+        assert store.put({'age': age}, path)
+        assert store.get(path) == {'age': age}
+    assert yaml.safe_load(path.read_text()) == {'age': 30}  # still quiet-period pending
+    assert len(reads) == 1
+
+    deadline = time.monotonic() + 5
+    while store.dirty() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert store.writes == 1
+    assert yaml.safe_load(path.read_text()) == {'age': 40}
+
+
+def test_flush_writes_pending_changes_immediately(tmp_path):
+    path = tmp_path / 'profile.yaml'
+    store = ProfileStore(delay=60)
+    store.put({'sex': 'Female', 'weight_kg': 60.0}, path)
+    store.flush()
+    assert yaml.safe_load(path.read_text()) == {'sex': 'Female', 'weight_kg': 60.0}
+    assert store.dirty() == 0
+    store.flush()
+    assert store.writes == 1
+
+
+def test_failed_write_stays_dirty(tmp_path, monkeypatch):
+    path = tmp_path / 'profile.yaml'
+    store = ProfileStore(delay=60)
+    store.put({'age': 1.0}, path)
+
+    def fail(profile, p):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(profile_store, 'save_profile', fail)
+    try:
+        store.flush()
+    except OSError:
+        pass
+    assert store.dirty() == 1
+    monkeypatch.undo()
+    store.flush()
+    assert yaml.safe_load(path.read_text()) == {'age': 1.0}
+
+
+def test_writer_survives_unexpected_errors(tmp_path, monkeypatch):
+    path = tmp_path / 'profile.yaml'
+    store = ProfileStore(delay=0.05)
+    calls = []
+    save = profile_store.save_profile
+
+    def flaky(profile, p):
+        calls.append(profile)
+        if len(calls) == 1:
+            raise ValueError('cannot represent')
+        save(profile, p)
+
+    monkeypatch.setattr(profile_store, 'save_profile', flaky)
+    store.put({'age': 1.0}, path)
+    deadline = time.monotonic() + 5
+    while not (calls and not store.dirty()) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    with pytest.raises(ValueError):
+        store.flush()
+
+    store.put({'age': 2.0}, path)  # the writer thread is still alive
+    while store.dirty() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert yaml.safe_load(path.read_text()) == {'age': 2.0}
+    store.flush()
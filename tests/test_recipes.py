@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from macro_manager.db import delete_foods, invalidate_foods_cache, load_foods, put_food, put_recipe, save_foods
+from macro_manager.models import Food, FoodTable, Meal
+from macro_manager.summary import lookup_foods
+
+
+def library():
+    table = FoodTable([
+        Food('egg', 6, 5, 0.6, sodium=70, potassium=70),
+        Food('guac', 1, 10, 5, fiber=3, sodium=270, potassium=280),
+        Food('toast', 2.6, 1, 12, fiber=0.7, sodium=127),
+        Food('rice', 2, 0, 23),
+    ])
+    table.set_recipe('omelet', {'egg': 4, 'guac': 1})
+    table.set_recipe('brunch', {'omelet': 1, 'toast': 2, 'egg': 1})
+    table.set_recipe('rice bowl', {'rice': 2})
+    return table
+
+
+def test_recipe_matches_combo_sum_and_nests():
+    table = library()
+    omelet = 4 * table['egg'].vector + table['guac'].vector
+    assert np.allclose(table['omelet'].vector, omelet)
+    assert np.allclose(table['brunch'].vector, omelet + 2 * table['toast'].vector + table['egg'].vector)
+
+
+def test_ingredient_edit_recomputes_only_downstream(monkeypatch):
+    table = library()
+    flattened = []
+    original = FoodTable._flatten
+    monkeypatch.setattr(FoodTable, '_flatten', lambda self, data, name: flattened.append(name) or original(self, data, name))
+    meal = Meal(table=table)
+    meal.add(table['brunch'], 1)
+    before = meal.totals['protein']
+
+    table['egg'] = Food('egg', 7, 5, 0.6)
+    assert flattened == ['omelet', 'brunch']
+    assert table['brunch'].protein == pytest.approx(4 * 7 + 1 + 2 * 2.6 + 7)
+    meal.recompute()
+    assert meal.totals['protein'] == pytest.approx(before + 5)
+
+    flattened.clear()
+    table['egg'].fat = 6
+    assert flattened == ['omelet', 'brunch']
+
+
+def test_cycles_are_rejected_and_deleted_ingredients_count_as_zero():
+    table = library()
+    with pytest.raises(ValueError):
+        table.set_recipe('omelet', {'brunch': 1})
+    with pytest.raises(ValueError):
+        table.set_recipe('rice bowl', {'rice bowl': 1})
+    del table['guac']
+    assert np.allclose(table['omelet'].vector, 4 * table['egg'].vector)
+    table['guac'] = Food('guac', 1, 10, 5)
+    assert table['omelet'].fat == pytest.approx(30)
+
+
+def test_recipes_persist_through_yaml_snapshot_and_journal(tmp_path):
+    path = tmp_path / 'foods.yaml'
+    save_foods(library(), path)
+    invalidate_foods_cache()
+    foods = load_foods(path)  # snapshot
+    assert foods.recipes['brunch'] == {'omelet': 1.0, 'toast': 2.0, 'egg': 1.0}
+
+    foods = put_food(foods, Food('egg', 7, 5, 0.6), path)
+    foods = put_recipe(foods, 'egg toast', {'egg': 1, 'toast': 1}, path)
+    foods = delete_foods(foods, ['guac'], path)
+    expected = {name: foods[name].vector.copy() for name in foods}
+    # The headless reader only sees flattened rows, snapshot + journal
+    assert lookup_foods(['brunch'], path)['brunch'] == pytest.approx(expected['brunch'])
+
+    invalidate_foods_cache()
+    foods = load_foods(path)  # snapshot + journal replay
+    assert 'egg toast' in foods.recipes
+    for name, vector in expected.items():
+        assert np.allclose(foods[name].vector, vector)
+
+    path.with_name('foods.yaml.bin').unlink()
+    save_foods(foods, path)
+    path.with_name('foods.yaml.bin').unlink()
+    invalidate_foods_cache()
+    foods = load_foods(path)  # YAML
+    assert foods.recipes['omelet'] == {'egg': 4.0, 'guac': 1.0}
+    for name, vector in expected.items():
+        assert np.allclose(foods[name].vector, vector)
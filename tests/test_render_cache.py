@@ -0,0 +1,25 @@
+from macro_manager.render_cache import RenderCache, dashboard_key
+
+TOTALS = {"protein": 12.0, "fat": 10.0, "carb": 1.2}
+
+
+def test_key_ignores_float_noise_but_not_inputs():
+    base = dashboard_key(TOTALS, 142.8, 2000, None, "png")
+    noisy = {k: v + 1e-9 for k, v in TOTALS.items()}
+    assert dashboard_key(noisy, 142.8, 2000, None, "png") == base
+    assert dashboard_key(TOTALS, 142.8, 2000, 50, "png") != base
+    assert dashboard_key(TOTALS, 142.8, 2000, None, "svg") != base
+
+
+def test_lru_eviction_respects_budget():
+    cache = RenderCache(max_bytes=10)
+    renders = []
+    for key in "abc":
+        cache.get_or_render(key, lambda key=key: renders.append(key) or key.encode() * 4)
+    assert cache.get("a") is None  # evicted: 3 x 4 bytes > 10
+    assert cache.get_or_render("c", lambda: b"unused") == b"cccc"
+    cache.put("huge", b"x" * 11)
+    stats = cache.stats()
+    assert renders == ["a", "b", "c"]
+    assert stats["evictions"] == 1 and stats["hits"] == 1
+    assert stats["bytes"] == 8 and stats["entries"] == 2
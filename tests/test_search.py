@@ -0,0 +1,37 @@
+from macro_manager.search import FoodIndex, food_index
+from macro_manager.models import Food, FoodTable
+
+NAMES = ['Greek Yogurt', 'Yogurt, plain', 'Chicken Breast', 'Chicken Thigh', 'Rice Cake', 'brown rice']
+
+
+def test_search_ranks_prefix_then_word_then_fuzzy():
+    index = FoodIndex(NAMES)
+    assert index.search('chicken', 2) == ['Chicken Thigh', 'Chicken Breast']
+    assert index.search('yog')[:2] == ['Yogurt, plain', 'Greek Yogurt']
+    assert index.search('rice')[0] == 'Rice Cake'
+    assert index.search('chikcen breast')[0] == 'Chicken Breast'  # typo
+    assert index.search('', 3) == ['brown rice', 'Chicken Breast', 'Chicken Thigh']
+    assert index.search('zzz') == []
+
+
+def test_search_keeps_every_substring_match():
+    index = FoodIndex(['yogurt', 'greek_yogurt', 'froyogurt', 'oats'])
+    assert index.search('yog') == ['yogurt', 'greek_yogurt', 'froyogurt']
+    assert sorted(index.search('gurt')) == ['froyogurt', 'greek_yogurt', 'yogurt']
+
+
+def test_incremental_updates_match_rebuild():
+    index = FoodIndex(NAMES)
+    index.add('Rice Pudding')
+    index.remove('Rice Cake')
+    fresh = FoodIndex([n for n in NAMES if n != 'Rice Cake'] + ['Rice Pudding'])
+    for query in ['ri', 'rice', 'pudding', 'cake', 'ricepud']:
+        assert index.search(query) == fresh.search(query)
+
+
+def test_food_index_is_shared_per_table():
+    table = FoodTable([Food('egg', 6, 5, 0.6)])
+    index = food_index(table)
+    assert food_index(table) is index
+    table['toast'] = Food('toast', 3, 1, 15)  # changed without updating the index
+    assert 'toast' in food_index(table)
@@ -0,0 +1,55 @@
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from macro_manager.db import load_foods, put_food, save_foods
+from macro_manager.models import Food, Meal
+from macro_manager.schema import FOODS_YAML, snapshot_path
+from macro_manager.summary import lookup_foods, meal_summary
+
+
+def test_summary_matches_meal_and_applies_journal(tmp_path):
+    foods_path = tmp_path / 'foods.yaml'
+    save_foods({'egg': Food('egg', 6, 5, 0.6, sodium=70), 'toast': Food('toast', 3, 1, 15)}, foods_path)
+    put_food(load_foods(foods_path), Food('toast', 4, 1, 20, fiber=2), foods_path)
+    meal_path = tmp_path / 'meal.yaml'
+    meal_path.write_text('- food: egg\n  servings: 2\n- food: toast\n- food: ghost\n  servings: 1\n')
+
+    summary = meal_summary(meal_path, foods_path, burned_kcal=2000)
+    meal = Meal()
+    meal.add(load_foods(foods_path)['egg'], 2)
+    meal.add(load_foods(foods_path)['toast'], 1)
+    assert summary['totals'] == pytest.approx(meal.totals)
+    assert summary['kcal'] == pytest.approx(meal.calories)
+    assert summary['net_kcal'] == pytest.approx(meal.calories - 2000)
+    assert summary['missing'] == ['ghost']
+
+
+def test_lookup_without_snapshot_flattens_recipes(tmp_path):
+    foods_path = tmp_path / 'foods.yaml'
+    # omelet's saved nutrients are stale: egg was edited by hand
+    foods_path.write_text('egg:\n  protein: 7\nomelet:\n  protein: 12\n  recipe:\n    egg: 2\n')
+    assert lookup_foods(['omelet'], foods_path)['omelet'][0] == 14
+    assert snapshot_path(foods_path).exists()
+    assert lookup_foods(['omelet'], foods_path)['omelet'][0] == 14
+
+
+def test_totals_cli_skips_heavy_imports(tmp_path):
+    foods_path = tmp_path / 'foods.yaml'
+    shutil.copyfile(FOODS_YAML, foods_path)
+    load_foods(foods_path)  # the CLI only stays NumPy-free with a current snapshot
+    root = Path(__file__).resolve().parents[1]
+    code = (
+        "import sys, runpy; sys.argv = ['macro-manager', 'totals', sys.argv[1], '--burned', '0', '--foods', sys.argv[2]]\n"
+        "try: runpy.run_module('macro_manager', run_name='__main__')\n"
+        "except SystemExit: pass\n"
+        "heavy = {'numpy', 'pandas', 'matplotlib', 'streamlit'} & set(sys.modules)\n"
+        "assert not heavy, heavy\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code, str(root / 'data' / 'meal_today.yaml'), str(foods_path)],
+                         check=True, capture_output=True, text=True, cwd=root).stdout
+    assert set(json.loads(out)) == {'totals', 'kcal', 'burned_kcal', 'net_kcal', 'missing'}
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from macro_manager.models import Food, Meal
+from macro_manager.svg import dashboard_svg
+
+NS = "{http://www.w3.org/2000/svg}"
+
+
+def test_svg_dashboard_is_well_formed():
+    meal = Meal()
+    meal.add(Food('egg', 6, 5, 0.6, sodium=70, potassium=70), 2)
+    root = ET.fromstring(dashboard_svg(meal, 2100, 120))
+    texts = [t.text for t in root.iter(f"{NS}text")]
+    assert "Protein 12 g" in texts
+    assert f"{meal.calories:.0f} kcal" in texts
+    assert "2100 kcal" in texts
+    assert "140/2300mg" in texts
+    assert len(list(root.iter(f"{NS}rect"))) > 10
+
+
+def test_svg_backend_does_not_import_matplotlib():
+    code = (
+        "import sys; from macro_manager.models import Food, Meal; "
+        "from macro_manager.svg import dashboard_svg; "
+        "m = Meal(); m.add(Food('egg', 6, 5, 0.6)); dashboard_svg(m, 1800); "
+        "assert 'matplotlib' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).resolve().parents[1])
@@ -0,0 +1,36 @@
+import json
+import tracemalloc
+
+from macro_manager.tracing import rerun_trace, span, traced
+
+
+@traced()
+def work(n):
+    with span("inner"):
+        return sum(range(n))
+
+
+def test_spans_only_recorded_inside_rerun_trace(tmp_path):
+    assert work(10) == 45  # no active trace: plain call
+
+    path = tmp_path / 'trace.jsonl'
+    with rerun_trace(True, path) as trace:
+        work(1000)
+    assert [(s.name, s.depth) for s in trace.spans] == [
+        ('rerun', 0), ('test_tracing.work', 1), ('inner', 2)
+    ]
+    assert all(s.alloc_kib is not None for s in trace.spans)
+    assert not tracemalloc.is_tracing()  # stopped with the rerun that started it
+
+    tracemalloc.start()
+    with rerun_trace(True, tmp_path / 'other.jsonl'):
+        pass
+    assert tracemalloc.is_tracing()  # left running for whoever started it
+    tracemalloc.stop()
+
+    record = json.loads(path.read_text())
+    assert [s['name'] for s in record['spans']] == ['rerun', 'test_tracing.work', 'inner']
+
+    with rerun_trace(False) as trace:
+        work(10)
+    assert trace is None
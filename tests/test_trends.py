@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from macro_manager.trends import downsample_frame, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    y[437] = 25.0
+    keep = lttb_indices(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 437 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_minmax_keeps_extremes():
+    y = np.random.default_rng(0).normal(size=500)
+    keep = minmax_indices(y, 50)
+    assert y.argmax() in keep and y.argmin() in keep
+    assert len(keep) <= 50
+
+
+def test_downsample_frame_bounds_payload():
+    idx = pd.date_range("2010-01-01", periods=5000, freq="D")
+    df = pd.DataFrame({"a": np.arange(5000.0), "b": np.cos(np.arange(5000.0))}, index=idx)
+    out = downsample_frame(df, ["a", "b"], max_points=400)
+    assert len(out) <= 400
+    assert out.index.is_monotonic_increasing
+    assert len(downsample_frame(df.iloc[:100], ["a", "b"], 400)) == 100